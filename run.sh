@@ -1,2 +1,2 @@
 #!/bin/bash
-python src/main.py "$1" "$2"
+python src/main.py "$@"
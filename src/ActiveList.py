@@ -1,58 +1,96 @@
 from dataclasses import dataclass
-from collections import OrderedDict
 
 
-@dataclass
+@dataclass(slots=True)
 class ActiveListEntry:
     done: bool
     exception: bool
     logicalDest: int
     oldDest: int
-    # PC as key of active list entry
+    pc: int
 
 ''' bypassing queue '''
 class ActiveList:
-    capacity: int = 32
-
-    def __init__(self) -> None:
-        self.active: OrderedDict[int, ActiveListEntry] = OrderedDict()
+    def __init__(self, capacity: int = 32) -> None:
+        self.capacity: int = capacity
+        # circular buffer in program order: `head` is the oldest entry
+        # One record per slot, reused in place, so renaming allocates nothing.
+        self.slots: list[ActiveListEntry] = [ActiveListEntry(False, False, 0, 0, 0)
+                                             for _ in range(capacity)]
+        self.head : int = 0
+        self.count: int = 0
     
     def __len__(self) -> int:
-        return len(self.active)
+        return self.count
     
     def available(self, size = 4) -> bool:
         return self.capacity - len(self) >= size
     
-    def __getitem__(self, key: int) -> ActiveListEntry:
-        return self.active[key]
-    
-    def __setitem__(self, key: int, entry: ActiveListEntry) -> None:
-        self.active[key] = entry
-    
-    def __delitem__(self, key: int) -> None:
-        del self.active[key]
+    def __getitem__(self, slot: int) -> ActiveListEntry | None:
+        ''' entry in `slot`, as returned by `append()`; `None` if the slot is free '''
+        if (slot - self.head) % self.capacity >= self.count:
+            return None
+        return self.slots[slot]
     
-    def pop(self, key: int) -> ActiveListEntry:
-        return self.active.pop(key)
+    def append(self, logicalDest: int, oldDest: int, pc: int) -> int:
+        ''' entries must be appended in program order; returns the slot, which
+            stays valid until the entry is removed
+        '''
+        if self.count == self.capacity:
+            raise IndexError('active list full')
+        slot = (self.head + self.count) % self.capacity
+        entry = self.slots[slot]
+        entry.done = False
+        entry.exception = False
+        entry.logicalDest = logicalDest
+        entry.oldDest = oldDest
+        entry.pc = pc
+        self.count += 1
+        return slot
     
-    def __contains__(self, key: int) -> bool:
-        return key in self.active
+    def peek(self, offset: int = 0) -> ActiveListEntry:
+        ''' `offset`-th oldest entry '''
+        if not 0 <= offset < self.count:
+            raise IndexError('active list offset out of range')
+        return self.slots[(self.head + offset) % self.capacity]
     
-    def keys(self) -> list[int]:
-        return list(self.active.keys())
+    def popleft(self) -> ActiveListEntry:
+        ''' remove the oldest entry, which is valid until the next `append()` '''
+        entry = self.peek(0)
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+        return entry
     
-    def firstKey(self) -> int:
-        return next(iter(self.active))
-    
-    def lastKeys(self, size) -> tuple[int]:
-        return tuple(self.active.keys())[-1:-size-1:-1] # reverse program order
+    def pop(self) -> ActiveListEntry:
+        ''' remove the youngest entry, which is valid until the next `append()` '''
+        entry = self.peek(self.count - 1)
+        self.count -= 1
+        return entry
     
+    def rows(self) -> dict[int, tuple[bool, bool, int, int]]:
+        ''' PC -> (done, exception, logical destination, old destination), in
+            program order; cheaper to take and compare than `dump()`
+        '''
+        slots, head, capacity = self.slots, self.head, self.capacity
+        return {entry.pc: (entry.done, entry.exception, entry.logicalDest, entry.oldDest)
+                for entry in (slots[(head + offset) % capacity] for offset in range(self.count))}
+
+    @staticmethod
+    def render(rows: dict[int, tuple[bool, bool, int, int]]) -> list[dict]:
+        ''' `rows()` in the layout of `dump()` '''
+        return [{'Done': done,
+                 'Exception': exception,
+                 'LogicalDestination': logicalDest,
+                 'OldDestination': oldDest,
+                 'PC': pc}
+                for pc, (done, exception, logicalDest, oldDest) in rows.items()]
+
     def dump(self) -> list[dict]:
-        def entry2dict(key: int) -> dict:
-            entry = self.active[key]
+        def entry2dict(entry: ActiveListEntry) -> dict:
             return {'Done': entry.done,
                     'Exception': entry.exception,
                     'LogicalDestination': entry.logicalDest,
                     'OldDestination': entry.oldDest,
-                    'PC': key}
-        return [entry2dict(key) for key in self.active]
+                    'PC': entry.pc}
+        return [entry2dict(self.slots[(self.head + offset) % self.capacity])
+                for offset in range(self.count)]
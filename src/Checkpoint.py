@@ -0,0 +1,33 @@
+import os
+import pickle
+import zlib
+from typing import Any
+
+
+''' compact binary checkpoints of the simulator state
+
+    File layout: `magic`, then a zlib-compressed pickle of a dict holding the
+    cycle number, the `OoO470` instance (all queues, pipeline latches and
+    exception flags) and whatever the caller needs to resume its own output.
+'''
+magic  : bytes = b'OoO470CK'
+version: int   = 5
+
+def save(path: str, state: dict[str, Any]) -> None:
+    payload = zlib.compress(pickle.dumps({'version': version, **state},
+                                         protocol=pickle.HIGHEST_PROTOCOL))
+    with open(path, 'wb') as fout:
+        fout.write(magic)
+        fout.write(payload)
+
+def load(path: str) -> dict[str, Any]:
+    with open(path, 'rb') as fin:
+        if fin.read(len(magic)) != magic:
+            raise ValueError(f'{path}: not an OoO470 checkpoint')
+        state = pickle.loads(zlib.decompress(fin.read()))
+    if state.pop('version') != version:
+        raise ValueError(f'{path}: unsupported checkpoint version')
+    return state
+
+def path(directory: str, cycle: int) -> str:
+    return os.path.join(directory, f'cycle{cycle:08d}.ckpt')
@@ -0,0 +1,127 @@
+import argparse
+import json
+from dataclasses import dataclass, fields, asdict
+from typing import Any
+
+from ISA import mnemonics, num_ar
+
+def isInt(value: Any) -> bool:
+    ''' JSON integers only: `bool` is an `int` subclass, but not a count '''
+    return isinstance(value, int) and not isinstance(value, bool)
+
+# command-line flag of each machine parameter
+flags: dict[str, str] = {'fetchWidth'    : 'fetch-width',
+                         'renameWidth'   : 'rename-width',
+                         'issueWidth'    : 'issue-width',
+                         'commitWidth'   : 'commit-width',
+                         'intQSize'      : 'intq-size',
+                         'activeListSize': 'active-list-size',
+                         'numPR'         : 'num-pr',
+                         'aluDepth'      : 'alu-depth'}
+
+@dataclass(frozen=True)
+class UnitType:
+    name     : str
+    ops      : tuple[str, ...] # mnemonics of the instructions it executes
+    count    : int = 1 # units of this type, each with its own issue port
+    latency  : int = 2 # cycles from issue to bypass, at least 2 (EX1 ... EX2)
+    occupancy: int = 1 # cycles a unit accepts no new instruction: 1 = fully pipelined
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.name, str) or not all(isinstance(op, str) for op in self.ops):
+            raise ValueError(f'unit {self.name}: name and opcodes must be strings')
+        for name in ('count', 'latency', 'occupancy'):
+            if not isInt(getattr(self, name)):
+                raise ValueError(f'unit {self.name}: {name} must be an integer')
+        unknown = set(self.ops) - set(mnemonics)
+        if unknown:
+            raise ValueError(f'unit {self.name}: unknown opcodes: {", ".join(sorted(unknown))}')
+        if self.count < 1 or self.occupancy < 1:
+            raise ValueError(f'unit {self.name}: count and occupancy must be positive')
+        if self.latency < 2:
+            raise ValueError(f'unit {self.name}: latency must be at least 2 (EX1 and EX2)')
+
+@dataclass(frozen=True)
+class MachineConfig:
+    fetchWidth    : int =  4 # instructions fetched per cycle, DIR capacity
+    renameWidth   : int =  4 # instructions renamed (and rolled back) per cycle
+    issueWidth    : int =  4 # instructions issued per cycle, ALU width
+    commitWidth   : int =  4 # instructions committed per cycle
+    intQSize      : int = 32
+    activeListSize: int = 32
+    numPR         : int = 64 # physical registers
+    aluDepth      : int =  2 # ALU pipeline stages, EX1 ... EX2
+    # functional units; `None`: `issueWidth` ALUs executing everything in `aluDepth` cycles
+    units: tuple[UnitType, ...] | None = None
+
+    def __post_init__(self) -> None:
+        for field in fields(self):
+            if field.name not in flags:
+                continue
+            if not isInt(getattr(self, field.name)):
+                raise ValueError(f'{field.name} must be an integer')
+            if getattr(self, field.name) < 1:
+                raise ValueError(f'{field.name} must be positive')
+        if self.aluDepth < 2:
+            raise ValueError('aluDepth must be at least 2 (EX1 and EX2)')
+        # otherwise renaming can never proceed
+        if self.numPR - num_ar < self.renameWidth:
+            raise ValueError(f'numPR must be at least {num_ar} + renameWidth')
+        if min(self.intQSize, self.activeListSize) < self.renameWidth:
+            raise ValueError('intQSize and activeListSize must be at least renameWidth')
+        if self.units is not None:
+            executed = [op for unit in self.units for op in unit.ops]
+            if sorted(executed) != sorted(mnemonics):
+                raise ValueError('every opcode must be executed by exactly one unit type')
+
+    def functionalUnits(self) -> tuple[UnitType, ...]:
+        ''' `units`, or the default ALUs '''
+        if self.units is not None:
+            return self.units
+        return (UnitType('alu', mnemonics, self.issueWidth, self.aluDepth),)
+
+    @classmethod
+    def fromDict(cls, config: dict[str, Any]) -> 'MachineConfig':
+        if not isinstance(config, dict):
+            raise ValueError('machine parameters must be a JSON object')
+        unknown = set(config) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f'unknown machine parameters: {", ".join(sorted(unknown))}')
+        if config.get('units') is not None:
+            # [{"name": "div", "ops": ["divu", "remu"], "latency": 12, ...}, ...]
+            try:
+                units = tuple(UnitType(**{**unit, 'ops': tuple(unit['ops'])})
+                              for unit in config['units'])
+            except (KeyError, TypeError) as e:
+                raise ValueError(f'bad functional unit: {e}') from None
+            config = {**config, 'units': units}
+        return cls(**config)
+
+    @classmethod
+    def fromJson(cls, path: str) -> 'MachineConfig':
+        with open(path, 'r') as fin:
+            return cls.fromDict(json.load(fin))
+
+    def toDict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @staticmethod
+    def addArguments(parser: argparse.ArgumentParser) -> None:
+        group = parser.add_argument_group('machine parameters',
+                                          'flags override values loaded with --config')
+        group.add_argument('--config', default=None, metavar='PATH',
+                           help='machine parameters as a JSON object; functional units '
+                                'are only configurable here, as "units"')
+        for field in fields(MachineConfig):
+            if field.name not in flags: # only in --config
+                continue
+            group.add_argument(f'--{flags[field.name]}', dest=field.name, type=int, default=None,
+                               metavar='N', help=f'default: {field.default}')
+
+    @classmethod
+    def fromArgs(cls, args: argparse.Namespace) -> 'MachineConfig':
+        config = {} if args.config is None else cls.fromJson(args.config).toDict()
+        for field in fields(cls):
+            if field.name in flags and getattr(args, field.name) is not None:
+                config[field.name] = getattr(args, field.name)
+        return cls.fromDict(config)
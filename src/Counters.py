@@ -0,0 +1,51 @@
+from typing import Any
+
+from Config import MachineConfig
+
+
+''' performance counters and stall attribution '''
+class Counters:
+    stallCauses: tuple[str] = ('freeListEmpty',     # rename: not enough free physical registers
+                               'activeListFull',    # rename: not enough active list entries
+                               'intQFull',          # rename: not enough integer queue entries
+                               'dirNotDrained',     # fetch: DIR still holds unrenamed instructions
+                               'operandsNotReady',  # issue: slots unused while IntQ entries wait
+                               'unitBusy',          # issue: slots unused while ready entries wait
+                                                    #     for a port or a non-pipelined unit
+                               'exceptionRecovery') # reset, rollback and halt cycles
+
+    def __init__(self, config: MachineConfig | None = None) -> None:
+        config = MachineConfig() if config is None else config
+        self.cycles   : int = 0
+        self.fetched  : int = 0
+        self.renamed  : int = 0
+        self.issued   : int = 0
+        self.committed: int = 0
+        self.stalls: dict[str, int] = dict.fromkeys(self.stallCauses, 0)
+        # occupancy at the start of each cycle: histogram[n] = cycles with n entries
+        self.intQOccupancy      : list[int] = [0,] * (config.intQSize + 1)
+        self.activeListOccupancy: list[int] = [0,] * (config.activeListSize + 1)
+
+    def sample(self, intQ: int, activeList: int) -> None:
+        ''' count a cycle starting with the given occupancies '''
+        self.cycles += 1
+        self.intQOccupancy[intQ] += 1
+        self.activeListOccupancy[activeList] += 1
+
+    def summary(self) -> dict[str, Any]:
+        def mean(histogram: list[int]) -> float:
+            return sum(n * cycles for n, cycles in enumerate(histogram)) / max(self.cycles, 1)
+
+        cycles = max(self.cycles, 1)
+        return {'Cycles': self.cycles,
+                'IPC': self.committed / cycles,
+                'Instructions': {stage: {'Total': count, 'PerCycle': count / cycles}
+                                 for stage, count in (('Fetched', self.fetched),
+                                                      ('Renamed', self.renamed),
+                                                      ('Issued', self.issued),
+                                                      ('Committed', self.committed))},
+                'StallCycles': dict(self.stalls),
+                'Occupancy': {'IntegerQueue': {'Mean': mean(self.intQOccupancy),
+                                               'Histogram': list(self.intQOccupancy)},
+                              'ActiveList': {'Mean': mean(self.activeListOccupancy),
+                                             'Histogram': list(self.activeListOccupancy)}}}
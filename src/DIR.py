@@ -1,11 +1,13 @@
 from dataclasses import dataclass
 from collections import deque
 
+from ISA import Op
 
-@dataclass
+
+@dataclass(slots=True)
 class DIREntry:
     dest: int # logical destination register
-    op: str
+    op: Op
     pc: int
 
     aRegTag: int # logical source register
@@ -14,10 +16,12 @@ class DIREntry:
     bValue: int # immediate
 
 class DIR:
-    capacity: int = 4
-
-    def __init__(self) -> None:
+    def __init__(self, capacity: int = 4) -> None:
+        self.capacity: int = capacity
         self.decodedInstr: deque[DIREntry] = deque()
+        # Fetch only refills an empty DIR, so it can decode into these.
+        self.records: list[DIREntry] = [DIREntry(0, Op.ADD, 0, 0, None, None)
+                                        for _ in range(capacity)]
     
     def __len__(self) -> int:
         return len(self.decodedInstr)
@@ -0,0 +1,73 @@
+import argparse
+from dataclasses import dataclass
+
+from OoO470 import OoO470, structures
+
+
+''' which cycles, and which structures, are written to the log
+
+    With no criterion set, every cycle is recorded, as always. Otherwise a
+    cycle is recorded if any criterion selects it, and each record carries
+    its cycle number under "Cycle".
+'''
+@dataclass(frozen=True)
+class DumpPolicy:
+    final     : bool = False                  # the last cycle
+    every     : int | None = None             # cycles 0, N, 2N, ...
+    cycles    : frozenset[int] = frozenset()  # listed cycles
+    exceptions: bool = False                  # cycles in exception mode
+    pcRange   : tuple[int, int] | None = None # cycles with lo <= PC <= hi in flight
+    fields    : tuple[str, ...] | None = None # structures to dump; `None`: all
+
+    def __post_init__(self) -> None:
+        if self.every is not None and self.every < 1:
+            raise ValueError('dump interval must be positive')
+        if self.pcRange is not None and self.pcRange[0] > self.pcRange[1]:
+            raise ValueError('empty PC range')
+        if self.fields is not None:
+            unknown = set(self.fields) - set(structures)
+            if unknown:
+                raise ValueError(f'unknown structures: {", ".join(sorted(unknown))}')
+
+    @property
+    def sparse(self) -> bool:
+        ''' whether some cycles may go unrecorded '''
+        return self.final or self.every is not None or bool(self.cycles) or \
+               self.exceptions or self.pcRange is not None
+
+    def wants(self, cycle: int, ooo470: OoO470, stop: bool = False) -> bool:
+        ''' whether to record `cycle`, just simulated; `stop`: it is the last one '''
+        if not self.sparse:
+            return True
+        return (self.final and stop)                                 or \
+               (self.every is not None and cycle % self.every == 0)  or \
+               cycle in self.cycles                                  or \
+               (self.exceptions and ooo470.eflag)                    or \
+               (self.pcRange is not None and ooo470.inFlight(*self.pcRange))
+
+    @staticmethod
+    def addArguments(parser: argparse.ArgumentParser) -> None:
+        group = parser.add_argument_group('dump policy',
+                                          'record only the selected cycles (any criterion); '
+                                          'default: every cycle')
+        group.add_argument('--dump-final', action='store_true', help='the last cycle')
+        group.add_argument('--dump-every', type=int, default=None, metavar='N',
+                           help='every N-th cycle, starting with cycle 0')
+        group.add_argument('--dump-cycles', type=int, nargs='+', default=[], metavar='CYCLE',
+                           help='the listed cycles')
+        group.add_argument('--dump-exceptions', action='store_true',
+                           help='cycles in exception mode')
+        group.add_argument('--dump-pc', type=int, nargs=2, default=None, metavar=('LO', 'HI'),
+                           help='cycles in which an instruction with LO <= PC <= HI is in flight')
+        group.add_argument('--dump-fields', nargs='+', default=None, choices=structures,
+                           metavar='STRUCTURE',
+                           help=f'only these structures ({", ".join(structures)})')
+
+    @classmethod
+    def fromArgs(cls, args: argparse.Namespace) -> 'DumpPolicy':
+        return cls(final=args.dump_final,
+                   every=args.dump_every,
+                   cycles=frozenset(args.dump_cycles),
+                   exceptions=args.dump_exceptions,
+                   pcRange=None if args.dump_pc is None else tuple(args.dump_pc),
+                   fields=None if args.dump_fields is None else tuple(args.dump_fields))
@@ -3,11 +3,10 @@ from collections import deque
 
 ''' bypassing queue '''
 class FreeList:
-    capacity: int = 32
-    num_ar  : int = 32
-    num_pr  : int = 64
-
-    def __init__(self) -> None:
+    def __init__(self, num_ar: int = 32, num_pr: int = 64) -> None:
+        self.num_ar: int = num_ar
+        self.num_pr: int = num_pr
+        self.capacity: int = num_pr - num_ar
         self.free = deque(range(self.num_ar,
                                 self.num_pr))
     def __len__(self) -> int:
@@ -0,0 +1,47 @@
+from typing import Callable
+
+from ISA     import mnemonics, num_ar, opcodes
+from Program import Program
+
+
+''' semantics per mnemonic, written independently of `ISA.execute` so that
+    the fuzzer's reference does not share the pipeline's ALU code: the
+    result, or `None` if the instruction raises an exception
+'''
+semantics: dict[str, Callable[[int, int], int | None]] = {
+    'add' : lambda a, b: a + b,
+    'addi': lambda a, imm: a + imm,
+    'sub' : lambda a, b: a - b,
+    'mulu': lambda a, b: a * b,
+    'divu': lambda a, b: None if b == 0 else a // b,
+    'remu': lambda a, b: None if b == 0 else a % b,
+}
+table: tuple[Callable[[int, int], int | None], ...] = tuple(semantics[m] for m in mnemonics)
+immediate: int = opcodes['addi']
+
+''' functional (architectural, untimed) execution '''
+def run(program: Program, regs: list[int], start: int = 0,
+        stopPC: int | None = None, count: int | None = None) -> tuple[int, int, bool]:
+    ''' execute `program` in order from `start`, updating `regs` in place
+        Stops before `stopPC`, after `count` instructions, at the end of the
+        program, or before an instruction that raises an exception, whichever
+        comes first. Returns (next PC, instructions executed, stopped at
+        exception).
+    '''
+    end = len(program) if stopPC is None else min(stopPC, len(program))
+    if count is not None:
+        end = min(end, start + count)
+    ops, dests, aRegs, bRegs, imms = program.op, program.dest, program.aReg, program.bReg, program.imm
+    pc = start
+    while pc < end:
+        op = ops[pc]
+        result = table[op](regs[aRegs[pc]], imms[pc] if op == immediate else regs[bRegs[pc]])
+        if result is None:
+            return pc, pc - start, True
+        regs[dests[pc]] = result
+        pc += 1
+    return pc, pc - start, False
+
+def registers() -> list[int]:
+    ''' architectural register file at reset '''
+    return [0,] * num_ar
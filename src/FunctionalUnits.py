@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from collections import deque
+from typing      import Iterable
+
+from Config import UnitType
+from IntQ   import IntQEntry
+from ISA    import Op, execute, opcodes
+
+
+@dataclass(slots=True)
+class ALUEntry:
+    dest: int
+    pc: int
+    slot: int # active list slot
+    result: int
+    exception: bool
+
+''' functional units of several types, with per-opcode latency and occupancy '''
+class FunctionalUnits:
+    def __init__(self, units: tuple[UnitType, ...], width: int = 4) -> None:
+        self.units: tuple[UnitType, ...] = units
+        self.width: int = width
+        # per-opcode table
+        self.unitOf   : list[int] = [0,] * len(Op) # index into `units`
+        self.latency  : list[int] = [0,] * len(Op)
+        self.occupancy: list[int] = [0,] * len(Op)
+        for idx, unit in enumerate(units):
+            for mnemonic in unit.ops:
+                op = opcodes[mnemonic]
+                self.unitOf[op] = idx
+                self.latency[op] = unit.latency
+                self.occupancy[op] = unit.occupancy
+        self.depth: int = max(unit.latency for unit in units) # pipeline stages, EX1 ... EX2
+        # Without port constraints, issue only depends on the issue width.
+        self.constrained: bool = any(unit.count < width or unit.occupancy > 1 for unit in units) \
+                                 or len(units) > 1
+        self.cycle: int = 0
+        self.nextFree: list[list[int]] = [[0,] * unit.count for unit in units] # cycle each unit is free
+        # completion calendar: `calendar[k]` completes `k` + 1 cycles from now
+        self.calendar: deque[list[ALUEntry]] = deque([] for _ in range(self.depth - 1))
+        # Results are only read in the cycle they complete: at the next
+        # `ex2()`, their list and records are recycled.
+        self.completed: list[ALUEntry] = []
+        self.pool     : list[ALUEntry] = []
+        self.empty: tuple[None] = (None,) * width # shared by all empty bundles
+
+    def ports(self) -> list[int]:
+        ''' issue ports free this cycle, per unit type '''
+        return [sum(free <= self.cycle for free in nextFree) for nextFree in self.nextFree]
+
+    def reserve(self, instrs: list[IntQEntry]) -> None:
+        ''' occupy a free unit for each instruction issued this cycle '''
+        for entry in instrs:
+            nextFree = self.nextFree[self.unitOf[entry.op]]
+            unit = next(idx for idx, free in enumerate(nextFree) if free <= self.cycle)
+            nextFree[unit] = self.cycle + self.occupancy[entry.op]
+
+    def ex1(self, job: tuple[IntQEntry]) -> None:
+        ''' compute, and schedule the results on the completion calendar '''
+        pool = self.pool
+        for entry in job:
+            if entry is None: # issue packs bundles from the front
+                break
+            result, exception = execute(entry.op, entry.aValue, entry.bValue)
+            if pool:
+                alu = pool.pop()
+                alu.dest = entry.dest
+                alu.pc = entry.pc
+                alu.slot = entry.slot
+                alu.result = result
+                alu.exception = exception
+            else:
+                alu = ALUEntry(entry.dest, entry.pc, entry.slot, result, exception)
+            self.calendar[self.latency[entry.op] - 2].append(alu)
+
+    def ex2(self) -> list[ALUEntry]:
+        ''' start a new cycle: the results completing in it, valid until the next call '''
+        self.cycle += 1
+        free = self.completed
+        self.pool.extend(free)
+        free.clear()
+        self.calendar.append(free)
+        self.completed = self.calendar.popleft()
+        return self.completed
+
+    def nextCompletion(self, jobs: Iterable[tuple[IntQEntry]]) -> int | None:
+        ''' cycles until the next result completes, given the issued `jobs` still
+            waiting for EX1, one per cycle; `None` if nothing is in flight
+        '''
+        first: int | None = next((k + 1 for k, results in enumerate(self.calendar) if results), None)
+        for idx, job in enumerate(jobs):
+            if job[0] is not None:
+                done = idx + min(self.latency[entry.op] for entry in job if entry is not None)
+                first = done if first is None else min(first, done)
+        return first
+
+    def clear(self) -> None:
+        for results in self.calendar:
+            results.clear()
@@ -0,0 +1,49 @@
+from time import perf_counter_ns
+
+
+''' stage hooks: callbacks around each pipeline stage of `OoO470.next()`
+
+    Stages are 'EX2', 'C', 'EX1', 'I', 'R&D', 'F&D' and, in exception mode,
+    'ROLLBACK'; `OoO470.skip()` reports 'skip'. `main.py` brackets snapshots
+    ('dump') and log writes ('log') the same way. With no hooks installed,
+    `next()` makes no hook calls.
+'''
+class Hooks:
+    def pre(self, stage: str) -> None:
+        pass
+
+    def post(self, stage: str) -> None:
+        pass
+
+''' wall time per stage '''
+class StageProfiler(Hooks):
+    def __init__(self) -> None:
+        self.ns   : dict[str, int] = {} # accumulated nanoseconds
+        self.calls: dict[str, int] = {}
+        self.start: int = 0
+
+    def pre(self, stage: str) -> None:
+        self.start = perf_counter_ns()
+
+    def post(self, stage: str) -> None:
+        elapsed = perf_counter_ns() - self.start
+        self.ns[stage] = self.ns.get(stage, 0) + elapsed
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def share(self) -> dict[str, float]:
+        ''' fraction of the profiled time spent in each stage '''
+        total = sum(self.ns.values()) or 1
+        return {stage: ns / total for stage, ns in self.ns.items()}
+
+    def report(self) -> str:
+        rows = [('stage', 'calls', 'total ms', 'ns/call', 'share')]
+        share = self.share()
+        for stage, ns in sorted(self.ns.items(), key=lambda item: -item[1]):
+            calls = self.calls[stage]
+            rows.append((stage, str(calls), f'{ns / 1e6:.3f}', f'{ns / calls:.0f}',
+                         f'{share[stage]:.1%}'))
+        rows.append(('total', '', f'{sum(self.ns.values()) / 1e6:.3f}', '', ''))
+        widths = [max(len(row[col]) for row in rows) for col in range(len(rows[0]))]
+        return '\n'.join('  '.join([row[0].ljust(widths[0])] +
+                                   [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])])
+                         for row in rows)
@@ -0,0 +1,36 @@
+from enum import IntEnum
+
+
+class Op(IntEnum):
+    ADD  = 0
+    ADDI = 1
+    SUB  = 2
+    MULU = 3
+    DIVU = 4
+    REMU = 5
+
+mnemonics: tuple[str] = tuple(op.name.lower() for op in Op)
+opcodes  : dict[str, Op] = {mnemonic: Op(code) for code, mnemonic in enumerate(mnemonics)}
+num_ar   : int = 32 # architectural registers x0 ... x31
+
+def execute(op: Op, a: int, b: int) -> tuple[int, bool]:
+    ''' architectural semantics: (result, exception) '''
+    result: int = 0
+    exception: bool = False
+    if op == Op.ADD or op == Op.ADDI:
+        result = a + b
+    elif op == Op.SUB:
+        result = a - b
+    elif op == Op.MULU:
+        result = a * b
+    elif op == Op.DIVU:
+        if b == 0:
+            exception = True
+        else:
+            result = a // b
+    elif op == Op.REMU:
+        if b == 0:
+            exception = True
+        else:
+            result = a % b
+    return result, exception
@@ -1,10 +1,17 @@
 from dataclasses import dataclass
+from heapq       import heappop, heappush
+from typing      import TYPE_CHECKING, Sequence
 
+from ISA import Op, mnemonics
 
-@dataclass
+if TYPE_CHECKING:
+    from FunctionalUnits import ALUEntry
+
+
+@dataclass(slots=True)
 class IntQEntry:
     dest: int # physical destination register
-    op: str
+    op: Op
     pc: int
 
     aReady: bool
@@ -16,12 +23,18 @@ class IntQEntry:
     aValue: int = 0
     bValue: int = 0
 
+    slot: int = 0 # active list slot
+
 ''' bypassing queue '''
 class IntQ:
-    capacity: int = 32
-
-    def __init__(self) -> None:
-        self.buffer: list[IntQEntry] = [] # strictly speaking, not a queue
+    def __init__(self, capacity: int = 32) -> None:
+        self.capacity: int = capacity
+        # Strictly speaking, not a queue. Entries are kept in program order,
+        # keyed by PC, so that issued entries are removed in O(1).
+        self.buffer : dict[int, IntQEntry]       = {}
+        self.waiting: dict[int, list[IntQEntry]] = {} # physical tag -> entries waiting for it
+        self.ready  : list[int]                  = [] # min-heap of PCs of ready entries
+        self.pool   : list[IntQEntry]            = [] # executed entries, reused by `acquire()`
     
     def __len__(self) -> int:
         return len(self.buffer)
@@ -29,18 +42,124 @@ class IntQ:
     def available(self, size = 4) -> bool:
         return self.capacity - len(self) >= size
     
-    def __getitem__(self, idx: int) -> IntQEntry:
-        return self.buffer[idx]
-
-    def __delitem__(self, idx: int) -> None:
-        del self.buffer[idx]
+    def hasReady(self) -> bool:
+        return len(self.ready) > 0
     
     def clear(self) -> None:
         self.buffer.clear()
+        self.waiting.clear()
+        self.ready.clear()
+    
+    def acquire(self, dest: int, op: Op, pc: int, aReady: bool, bReady: bool,
+                aRegTag: int, bRegTag: int, aValue: int, bValue: int, slot: int) -> IntQEntry:
+        ''' a new entry, recycled from `pool` if possible '''
+        if not self.pool:
+            return IntQEntry(dest, op, pc, aReady, bReady, aRegTag, bRegTag, aValue, bValue, slot)
+        entry = self.pool.pop()
+        entry.dest = dest
+        entry.op = op
+        entry.pc = pc
+        entry.aReady = aReady
+        entry.bReady = bReady
+        entry.aRegTag = aRegTag
+        entry.bRegTag = bRegTag
+        entry.aValue = aValue
+        entry.bValue = bValue
+        entry.slot = slot
+        return entry
+    
+    def release(self, job: 'Sequence[IntQEntry | None]') -> None:
+        ''' return the entries of an executed bundle to `pool` '''
+        for entry in job:
+            if entry is None: # issue packs bundles from the front
+                break
+            self.pool.append(entry)
     
     def append(self, entry: IntQEntry) -> None:
-        self.buffer.append(entry)
+        self.buffer[entry.pc] = entry
+        if not entry.aReady:
+            self.waiting.setdefault(entry.aRegTag, []).append(entry)
+        if not entry.bReady:
+            self.waiting.setdefault(entry.bRegTag, []).append(entry)
+        if entry.aReady and entry.bReady:
+            heappush(self.ready, entry.pc)
+    
+    def wakeup(self, results: 'Sequence[ALUEntry | None]') -> None:
+        ''' capture bypassed results in the operands waiting for them '''
+        for result in results:
+            if (result is None) or result.exception:
+                continue
+            # An entry waiting on both operands is listed twice; it becomes
+            # ready at most once.
+            for entry in self.waiting.pop(result.dest, ()):
+                woken = False
+                if (not entry.aReady) and entry.aRegTag == result.dest:
+                    entry.aValue = result.result
+                    entry.aRegTag = 0
+                    entry.aReady = True
+                    woken = True
+                if (not entry.bReady) and entry.bRegTag == result.dest:
+                    entry.bValue = result.result
+                    entry.bRegTag = 0
+                    entry.bReady = True
+                    woken = True
+                if woken and entry.aReady and entry.bReady:
+                    heappush(self.ready, entry.pc)
+    
+    def select(self, width: int, unitOf: Sequence[int] | None = None,
+               ports: list[int] | None = None) -> list[IntQEntry]:
+        ''' remove and return up to `width` oldest ready entries
+            With `ports`, an entry also needs a free issue port of its unit type
+            `unitOf[op]`; `ports` is decremented for every entry selected.
+        '''
+        instrToIssue: list[IntQEntry] = []
+        if ports is None:
+            while self.ready and len(instrToIssue) < width:
+                instrToIssue.append(self.buffer.pop(heappop(self.ready)))
+            return instrToIssue
+        deferred: list[int] = [] # ready, but no port free
+        free = sum(ports)
+        while self.ready and len(instrToIssue) < width and free > 0:
+            pc = heappop(self.ready)
+            unit = unitOf[self.buffer[pc].op]
+            if ports[unit] == 0:
+                deferred.append(pc)
+                continue
+            ports[unit] -= 1
+            free -= 1
+            instrToIssue.append(self.buffer.pop(pc))
+        for pc in deferred:
+            heappush(self.ready, pc)
+        return instrToIssue
     
+    def rows(self) -> dict[int, tuple[int, bool, int, int, bool, int, int, Op]]:
+        ''' PC -> (dest, aReady, aRegTag, aValue, bReady, bRegTag, bValue, op), in
+            program order; cheaper to take and compare than `dump()`
+        '''
+        return {entry.pc: (entry.dest, entry.aReady, entry.aRegTag, entry.aValue,
+                           entry.bReady, entry.bRegTag, entry.bValue, entry.op)
+                for entry in self.buffer.values()}
+
+    @staticmethod
+    def render(rows: dict[int, tuple[int, bool, int, int, bool, int, int, Op]]) -> list[dict]:
+        ''' `rows()` in the layout of `dump()` '''
+        def unsign(x: int) -> int:
+            return x % (1 << 64) if x < 0 else x # Why does it work?
+
+        return [{'DestRegister': dest,
+
+                 'OpAIsReady': aReady,
+                 'OpARegTag': aRegTag,
+                 'OpAValue': unsign(aValue),
+
+                 'OpBIsReady': bReady,
+                 'OpBRegTag': bRegTag,
+                 'OpBValue': unsign(bValue),
+
+                 'OpCode': mnemonics[Op.ADD if op == Op.ADDI else op],
+                 'PC': pc}
+                for pc, (dest, aReady, aRegTag, aValue, bReady, bRegTag, bValue, op) in rows.items()]
+
     def dump(self) -> list[dict]:
         def unsign(x: int) -> int:
             return x % (1 << 64) if x < 0 else x # Why does it work?
@@ -56,6 +175,6 @@ class IntQ:
                     'OpBRegTag': entry.bRegTag,
                     'OpBValue': unsign(entry.bValue),
                     
-                    'OpCode': ('add' if entry.op == 'addi' else entry.op),
+                    'OpCode': mnemonics[Op.ADD if entry.op == Op.ADDI else entry.op],
                     'PC': entry.pc}
-        return list(map(entry2dict, self.buffer))
+        return list(map(entry2dict, self.buffer.values()))
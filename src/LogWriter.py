@@ -0,0 +1,62 @@
+import json
+from typing import Any, TextIO
+
+
+''' streaming per-cycle state log '''
+class LogWriter:
+    formats: tuple[str] = ('json', 'compact', 'ndjson')
+
+    def __init__(self, fout: TextIO, format: str = 'json') -> None:
+        if format not in self.formats:
+            raise ValueError(f'unknown log format: {format}')
+        self.fout  : TextIO = fout
+        self.format: str    = format
+        self.count : int    = 0 # number of records written
+        self.closed: bool   = False
+        # the last record written and its text, reused if the same record is
+        # written again (e.g., across idle cycles); records are never mutated
+        self.last    : Any = None
+        self.lastText: str = ''
+
+    def __enter__(self) -> 'LogWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def encode(self, record: Any) -> str:
+        ''' serialize a record, including the separator preceding it '''
+        if self.format == 'ndjson':
+            return json.dumps(record, separators=(',', ':')) + '\n'
+        elif self.format == 'compact':
+            return ('[' if self.count == 0 else ',\n') + \
+                   json.dumps(record, separators=(',', ':'))
+        else: # byte-identical to `json.dump(log, fout, indent=4)`
+            # JSON strings never contain raw newlines, so every newline is
+            # structural and can be re-indented one level deeper.
+            return ('[\n    ' if self.count == 0 else ',\n    ') + \
+                   json.dumps(record, indent=4).replace('\n', '\n    ')
+
+    def write(self, record: Any) -> None:
+        if record is self.last and self.count > 1: # same separator as last time
+            self.writeEncoded(self.lastText)
+            return
+        self.last, self.lastText = record, self.encode(record)
+        self.writeEncoded(self.lastText)
+
+    def writeEncoded(self, text: str) -> None:
+        ''' write a record already serialized by `encode` '''
+        self.fout.write(text)
+        self.count += 1
+
+    def close(self) -> None:
+        ''' terminate the JSON array; the underlying file is left open '''
+        if self.closed:
+            return
+        self.closed = True
+        if self.format == 'ndjson':
+            return
+        if self.count == 0:
+            self.fout.write('[]')
+        else:
+            self.fout.write('\n]' if self.format == 'json' else ']')
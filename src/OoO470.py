@@ -1,40 +1,56 @@
 from collections import deque
-from typing      import Any
-from copy        import deepcopy
+from typing      import Any, Callable, Collection, Sequence
 
-from ALU        import *
-from ActiveList import *
-from DIR        import *
-from FreeList   import *
-from IntQ       import *
+from ActiveList      import *
+from Config          import MachineConfig
+from Counters        import Counters
+import Functional
+from DIR             import *
+from FreeList        import *
+from FunctionalUnits import *
+from Hooks           import Hooks
+from IntQ            import *
+from ISA             import Op, num_ar
+from Program         import Program
+from Trace           import Trace
 
 class OoO470:
-    fetch_width: int =  4
-    num_ar     : int = 32
-    num_pr     : int = 64
     exceptionPC: int = 0x10000
 
-    def __init__(self, instructions: list[str]) -> None:
-        self.iCache: list[str] = instructions # instructions
+    def __init__(self, instructions: list[str] | Program, trace: Trace | None = None,
+                       config: MachineConfig | None = None, counters: bool = False) -> None:
+        self.config: MachineConfig = MachineConfig() if config is None else config
+        # performance counters, off if `None`; sized for this machine
+        self.counters: Counters | None = Counters(self.config) if counters else None
+        self.hooks   : Hooks    | None = None     # stage hooks, off if `None`
+        self.fetch_width : int = self.config.fetchWidth
+        self.rename_width: int = self.config.renameWidth
+        self.issue_width : int = self.config.issueWidth
+        self.commit_width: int = self.config.commitWidth
+        self.num_ar      : int = num_ar
+        self.num_pr      : int = self.config.numPR
+        # instructions are decoded once, up front
+        self.iCache: Program = instructions if isinstance(instructions, Program) \
+                                            else Program(instructions)
+        self.trace: Trace = Trace() if trace is None else trace
 
         self.pc : int = 0
         # F&D
-        self.dir: DIR = DIR()
+        self.dir: DIR = DIR(self.fetch_width)
         # R&D
-        self.freeList: FreeList = FreeList()
+        self.freeList: FreeList = FreeList(self.num_ar, self.num_pr)
         self.regMap: list[int] = list(range(self.num_ar)) # architectural-physical register map
         self.busy: list[bool] = [False,] * self.num_pr    # busy bit table
         self.prf = [0,] * self.num_pr                     # physical RF
-        self.iq: IntQ = IntQ()
+        self.iq: IntQ = IntQ(self.config.intQSize)
         # I
         self.i2ex1: deque[tuple[IntQEntry]] = deque()
-        # EX (2 stages)
-        self.alu = ALU()
-        self.ex22c: deque[tuple[ALUEntry]] = deque()
+        # EX (`aluDepth` stages by default)
+        self.fu: FunctionalUnits = FunctionalUnits(self.config.functionalUnits(), self.issue_width)
         # C
         
-        self.activeList: ActiveList = ActiveList()
-        self.bypass: tuple[ALUEntry] = (None,) * ALU.width # bypassing
+        self.activeList: ActiveList = ActiveList(self.config.activeListSize)
+        self.bypass: Sequence[ALUEntry | None] = self.fu.empty # bypassing: results completed this cycle
         # exception recovery
         self.exception: bool = False # exception mode buffer: 1-cycle delay
         self.halt     : bool = False # halt execution after exception recovery
@@ -45,234 +61,423 @@ class OoO470:
     def next(self) -> bool:
         ''' pipeline advances
             total order: EX2 < C < EX1 < I < R&D < F&D
-        '''        
-        if not self.eflag:
-            # EX2
-            print('EX2', end=' ')
-            try:
-                aluResult: tuple[ALUEntry] = self.alu.ex2()
-            except IndexError: # empty FIFO
-                pass
-            else:
-                self.ex22c.append(aluResult)
-                self.bypass = aluResult # bypassing
-            # C
-            print('C', end=' ')
-            # commit
-            num_commit: int = 0
-            pcOfInstrToCommit: list[int] = []
-            for pc in self.activeList.keys(): # key in program (ascending) order
-                if num_commit >= 4:
-                    break
+            The stages run in the order of `pipeline`, or `recovery` in
+            exception mode; with `hooks` set, every stage is bracketed by
+            `hooks.pre(stage)` and `hooks.post(stage)`. A stage returning a
+            bool ends the cycle, and `next()` returns that bool: C on an
+            exception (RESET, False), F&D and ROLLBACK (True once the run is
+            over). The other stages return `None`.
+        '''
+        counters: Counters | None = self.counters
+        if counters is not None:
+            counters.sample(len(self.iq), len(self.activeList))
+        hooks: Hooks | None = self.hooks
+        stages = recovery if self.eflag else pipeline
+        if hooks is None:
+            for _, stage in stages:
+                stop = stage(self)
+                if stop is not None:
+                    return stop
+            return False
+        for name, stage in stages:
+            hooks.pre(name)
+            stop = stage(self)
+            hooks.post(name)
+            if stop is not None:
+                return stop
+        return False
 
-                if self.activeList[pc].exception:
-                    print('RESET')
+    def ex2(self) -> None:
+        ''' results completing this cycle, which are also bypassed '''
+        if self.trace.stages:
+            self.trace.write('EX2 ')
+        self.bypass = self.fu.ex2() # bypassing
 
-                    self.eflag = True
-                    self.pc = self.exceptionPC
-                    self.epc = pc
+    def commit(self) -> bool | None:
+        ''' retire, then mark the instructions completed in EX2 done
+            On an exception, returns False: the cycle ends here, and the run
+            continues in exception mode.
+        '''
+        trace: bool = self.trace.stages
+        counters: Counters | None = self.counters
+        if trace:
+            self.trace.write('C ')
+        # commit: retire done instructions from the head of the active
+        # list and recycle their old registers, in one pass
+        activeList: ActiveList = self.activeList
+        num_commit: int = 0
+        while num_commit < self.commit_width and len(activeList) > 0:
+            oldest = activeList.peek(0) # in program order
+            if oldest.exception:
+                if trace:
+                    self.trace.write('RESET\n')
+                # non-faulting instructions before it are already committed
+                if counters is not None:
+                    counters.committed += num_commit
+                    counters.stalls['exceptionRecovery'] += 1
+                self.eflag = True
+                self.pc = self.exceptionPC
+                self.epc = oldest.pc
 
-                    self.dir.clear()
-                    self.iq.clear()
-                    self.alu.clear()
-                    # commit non-faulting instructions
-                    for pc in pcOfInstrToCommit:
-                        del self.activeList[pc]
-                    
-                    return self.halt
-                elif self.activeList[pc].done:
-                    pcOfInstrToCommit.append(pc)
-                    self.freeList.append(self.activeList[pc].oldDest) # update free list
-                    num_commit += 1
-                else: # incomplete instruction
-                    break
-            # delete active list entry
-            for pc in pcOfInstrToCommit:
-                del self.activeList[pc]
-            
-            # update free list
-            try:
-                instrToCommit: tuple[ALUEntry] = self.ex22c.popleft()
-            except IndexError: # empty FIFO
-                pass
-            else:
-                for entry in instrToCommit:
-                    if entry is not None:
-                        if entry.pc in self.activeList:
-                            self.activeList[entry.pc].done = True
-                            self.activeList[entry.pc].exception = entry.exception
-                        else:
-                            raise KeyError('instruction not in active list')
-            # EX1
-            print('EX1', end=' ')
-            try:
-                aluIn: tuple[IntQEntry] = self.i2ex1.popleft()
-            except IndexError: # empty FIFO
-                pass
-            else:
-                self.alu.ex1(aluIn)
-            # I
-            print('I', end=' ')
-            # First update integer queue with bypassed results, then issue
-            # instructions. This way, issue stage forwarding can be omitted.
-            for idx in range(len(self.iq)):
-                for result in self.bypass:
-                    if (result is not None) and (not result.exception):
-                        if (not self.iq[idx].aReady) and self.iq[idx].aRegTag == result.dest:
-                            self.iq[idx].aValue = result.result
-                            self.iq[idx].aRegTag = 0
-                            self.iq[idx].aReady = True
-                        if (not self.iq[idx].bReady) and self.iq[idx].bRegTag == result.dest:
-                            self.iq[idx].bValue = result.result
-                            self.iq[idx].bRegTag = 0
-                            self.iq[idx].bReady = True
-            # find instructions to issue
-            instrToIssue   : list[IntQEntry] = []
-            instrToIssueIdx: list[int]       = []
-            num_issue = 0
-            for idx in range(len(self.iq)): # Instruction with smaller PC has smaller index.
-                if num_issue >= 4:
-                    break
+                self.dir.clear()
+                self.iq.clear()
+                self.fu.clear()
+                return False
+            elif oldest.done:
+                activeList.popleft()
+                self.freeList.append(oldest.oldDest) # update free list
+                num_commit += 1
+            else: # incomplete instruction
+                break
+        if counters is not None:
+            counters.committed += num_commit
+
+        # mark completed instructions done, found by their active list slot
+        for entry in self.bypass:
+            instr = activeList[entry.slot]
+            if instr is None or instr.pc != entry.pc:
+                raise KeyError('instruction not in active list')
+            instr.done = True
+            instr.exception = entry.exception
+        return None
+
+    def ex1(self) -> None:
+        ''' compute the instructions issued last cycle '''
+        if self.trace.stages:
+            self.trace.write('EX1 ')
+        try:
+            aluIn: tuple[IntQEntry] = self.i2ex1.popleft()
+        except IndexError: # empty FIFO
+            pass
+        else:
+            self.fu.ex1(aluIn)
+            self.iq.release(aluIn)
 
-                if self.iq[idx].aReady and self.iq[idx].bReady:
-                    instrToIssue.append(self.iq[idx])
-                    instrToIssueIdx.append(idx)
-                    num_issue += 1
-            # make sure `instrToIssue` has exactly 4 elements
-            while len(instrToIssue) < 4:
+    def issue(self) -> None:
+        ''' wake up operands, then issue the oldest ready instructions '''
+        trace: bool = self.trace.stages
+        counters: Counters | None = self.counters
+        if trace:
+            self.trace.write('I ')
+        # First update integer queue with bypassed results, then issue
+        # instructions. This way, issue stage forwarding can be omitted.
+        self.iq.wakeup(self.bypass)
+        # issue the oldest ready instructions that have a free port
+        if self.fu.constrained:
+            instrToIssue: list[IntQEntry] = self.iq.select(self.issue_width, self.fu.unitOf,
+                                                            self.fu.ports())
+            self.fu.reserve(instrToIssue)
+        else:
+            instrToIssue: list[IntQEntry] = self.iq.select(self.issue_width)
+        if counters is not None:
+            counters.issued += len(instrToIssue)
+            if len(instrToIssue) < self.issue_width and self.iq.hasReady():
+                counters.stalls['unitBusy'] += 1
+            elif len(instrToIssue) < self.issue_width and len(self.iq) > 0:
+                counters.stalls['operandsNotReady'] += 1
+        # make sure `instrToIssue` has exactly `issue_width` elements
+        if not instrToIssue:
+            self.i2ex1.append(self.fu.empty)
+        else:
+            while len(instrToIssue) < self.issue_width:
                 instrToIssue.append(None)
             self.i2ex1.append(tuple(instrToIssue))
-            # clear issued instructions from integer queue
-            for idx in sorted(instrToIssueIdx, reverse=True): # indices in descending order! 
-                del self.iq.buffer[idx]
-            # R&D
-            print('R&D', end=' ')
-            # First update busy bit table and physical RF with bypassed results.
-            # This way, operand forwarding can be omitted.
-            for result in self.bypass:
-                if (result is not None) and (not result.exception):
-                    self.prf[result.dest] = result.result
-                    self.busy[result.dest] = False
-            # check free list, active list, and integer queue for enough entries
-            numInstrToRename = len(self.dir)
-            if self.freeList.available(numInstrToRename)   and \
-               self.activeList.available(numInstrToRename) and \
-               self.iq.available(numInstrToRename):
-                for _ in range(numInstrToRename):     # DIR is cleared
-                    decodedInstr = self.dir.popleft() #     when all instructions are popped.
-                    # rename
-                    new: int = self.freeList.popleft() # get free register from free list
-                    self.busy[new] = True              # update busy bit table
-                    # update active list
-                    # Attention: update active list before register map
-                    # This is because `oldDest` field of active list entry is the
-                    # corresponding register map entry. If register map were
-                    # updated first, such information would be lost.
-                    #
-                    # Attention: instructions are appended to active list in
-                    #            program order.
-                    self.activeList[decodedInstr.pc] = ActiveListEntry(done=False,
-                                                                       exception=False,
-                                                                       logicalDest=decodedInstr.dest,
-                                                                       oldDest=self.regMap[decodedInstr.dest])
-                    # dispatch
-                    # Attention: update integer queue before register map
-                    # This is because `aRegTag` and `bRegTag` fields of integer
-                    # queue entry are the corresponding register map entries.
-                    # If register map were updated first, operands not yet
-                    # available would refer to new physical registers. This is
-                    # problematic for accumulation, e.g.,
-                    #     add x4, x4, 1
-                    #
-                    # For a register operand, there are 2 possibilities:
-                    # 1. already in RF, either available long ago or forwarded just now
-                    # 2. not yet available
-                    prsA = self.regMap[decodedInstr.aRegTag] # operand A
-                    immB = decodedInstr.op == 'addi'         # operand B
-                    prsB = None if immB else self.regMap[decodedInstr.bRegTag]
-                    self.iq.append(IntQEntry(
-                        dest=new,
-                        op=decodedInstr.op,
-                        pc=decodedInstr.pc,
-                        aReady=(False if self.busy[prsA] else True),
-                        aRegTag=(prsA if self.busy[prsA] else 0),
-                        aValue=(0 if self.busy[prsA] else self.prf[prsA]),
-                        bReady=(True if immB
-                                     else (False if self.busy[prsB] else True)),
-                        bRegTag=(0 if immB else (prsB if self.busy[prsB] else 0)),
-                        bValue=(decodedInstr.bValue if immB
-                                                    else (0 if self.busy[prsB]
-                                                            else self.prf[prsB]))
-                    ))
-                    self.regMap[decodedInstr.dest] = new # update register map
-            #else: # do nothing
-            #    pass
 
-            # F&D
-            print('F&D')
-            if self.dir.available():
-                if self.pc >= len(self.iCache): # end of program
-                    return len(self.activeList) == 0
-                else:
-                    for i in range(self.pc, min(self.pc + self.fetch_width,
-                                                len(self.iCache))): # near program end: only case where < 4 instructions fetched
-                        self.dir.append(self.predecode(i))
-                self.pc = min(self.pc + self.fetch_width, # update PC
-                              len(self.iCache))
-        # exception mode
-        else:
-            if self.eflag and (not self.halt):
-                # roll back instructions
-                print('ROLLBACK')
-                pcOfInstrToRollback: tuple[int] = self.activeList.lastKeys(min(self.fetch_width, # reverse program order
-                                                                            len(self.activeList)))
-                for lastPC in pcOfInstrToRollback: 
-                    lastInstr = self.activeList[lastPC]
+    def rename(self) -> None:
+        ''' rename and dispatch the DIR, all or nothing '''
+        trace: bool = self.trace.stages
+        counters: Counters | None = self.counters
+        if trace:
+            self.trace.write('R&D ')
+        # First update busy bit table and physical RF with bypassed results.
+        # This way, operand forwarding can be omitted.
+        for result in self.bypass:
+            if (result is not None) and (not result.exception):
+                self.prf[result.dest] = result.result
+                self.busy[result.dest] = False
+        # check free list, active list, and integer queue for enough entries
+        numInstrToRename = min(len(self.dir), self.rename_width)
+        if self.freeList.available(numInstrToRename)   and \
+           self.activeList.available(numInstrToRename) and \
+           self.iq.available(numInstrToRename):
+            if counters is not None:
+                counters.renamed += numInstrToRename
+            for _ in range(numInstrToRename):     # DIR is cleared when all instructions
+                decodedInstr = self.dir.popleft() #     are popped, over several cycles if
+                                                  #     `rename_width` < `fetch_width`.
+                # rename
+                new: int = self.freeList.popleft() # get free register from free list
+                self.busy[new] = True              # update busy bit table
+                # update active list
+                # Attention: update active list before register map
+                # This is because `oldDest` field of active list entry is the
+                # corresponding register map entry. If register map were
+                # updated first, such information would be lost.
+                #
+                # Attention: instructions are appended to active list in
+                #            program order.
+                slot = self.activeList.append(logicalDest=decodedInstr.dest,
+                                              oldDest=self.regMap[decodedInstr.dest],
+                                              pc=decodedInstr.pc)
+                # dispatch
+                # Attention: update integer queue before register map
+                # This is because `aRegTag` and `bRegTag` fields of integer
+                # queue entry are the corresponding register map entries.
+                # If register map were updated first, operands not yet
+                # available would refer to new physical registers. This is
+                # problematic for accumulation, e.g.,
+                #     add x4, x4, 1
+                #
+                # For a register operand, there are 2 possibilities:
+                # 1. already in RF, either available long ago or forwarded just now
+                # 2. not yet available
+                prsA = self.regMap[decodedInstr.aRegTag] # operand A
+                immB = decodedInstr.op == Op.ADDI         # operand B
+                prsB = None if immB else self.regMap[decodedInstr.bRegTag]
+                self.iq.append(self.iq.acquire(
+                    dest=new,
+                    op=decodedInstr.op,
+                    pc=decodedInstr.pc,
+                    aReady=(False if self.busy[prsA] else True),
+                    aRegTag=(prsA if self.busy[prsA] else 0),
+                    aValue=(0 if self.busy[prsA] else self.prf[prsA]),
+                    bReady=(True if immB
+                                 else (False if self.busy[prsB] else True)),
+                    bRegTag=(0 if immB else (prsB if self.busy[prsB] else 0)),
+                    bValue=(decodedInstr.bValue if immB
+                                                else (0 if self.busy[prsB]
+                                                        else self.prf[prsB])),
+                    slot=slot
+                ))
+                self.regMap[decodedInstr.dest] = new # update register map
+        elif counters is not None: # do nothing but attribute the stall
+            counters.stalls[self.renameStall()] += 1
 
-                    releasedPR = self.regMap[lastInstr.logicalDest]
-                    self.regMap[lastInstr.logicalDest] = lastInstr.oldDest # roll back register map
-                    self.busy[releasedPR] = False                          # roll back busy bit table
-                    self.freeList.append(releasedPR)                       # roll back free list
-                # roll back active list
-                for lastPC in pcOfInstrToRollback:
-                    del self.activeList[lastPC]
-            
-            if len(self.activeList) == 0:
-                if self.halt: # exception recovered last cycle
-                    print()
-                    self.eflag = False
-                    return True
-                else: # exception just recovered this cycle
-                    self.halt = True
-                    return False
+    def fetch(self) -> bool:
+        ''' True once the program has ended and everything has committed '''
+        trace: bool = self.trace.stages
+        counters: Counters | None = self.counters
+        if trace:
+            self.trace.write('F&D\n')
+        if self.dir.available():
+            if self.pc >= len(self.iCache): # end of program
+                return len(self.activeList) == 0
             else:
+                # near program end: only case where < 4 instructions fetched
+                for decodedInstr in self.iCache.fetch(self.pc, self.pc + self.fetch_width,
+                                                      self.dir.records):
+                    self.dir.append(decodedInstr)
+                if counters is not None:
+                    counters.fetched += len(self.dir)
+            self.pc = min(self.pc + self.fetch_width, # update PC
+                          len(self.iCache))
+        elif counters is not None and self.pc < len(self.iCache):
+            counters.stalls['dirNotDrained'] += 1
+        return False
+
+    def recover(self) -> bool:
+        ''' exception mode: roll back, then halt; True when done '''
+        trace: bool = self.trace.stages
+        counters: Counters | None = self.counters
+        if counters is not None:
+            counters.stalls['exceptionRecovery'] += 1
+        if self.eflag and (not self.halt):
+            # roll back instructions
+            if trace:
+                self.trace.write('ROLLBACK\n')
+            for _ in range(min(self.rename_width, len(self.activeList))):
+                lastInstr = self.activeList.pop() # reverse program order
+
+                releasedPR = self.regMap[lastInstr.logicalDest]
+                self.regMap[lastInstr.logicalDest] = lastInstr.oldDest # roll back register map
+                self.busy[releasedPR] = False                          # roll back busy bit table
+                self.freeList.append(releasedPR)                       # roll back free list
+
+        if len(self.activeList) == 0:
+            if self.halt: # exception recovered last cycle
+                if trace:
+                    self.trace.write('\n')
+                self.eflag = False
+                return True
+            else: # exception just recovered this cycle
+                self.halt = True
                 return False
+        else:
+            return False
+
+    def idleCycles(self) -> int:
+        ''' number of upcoming cycles that provably change nothing but the
+            in-flight latches, i.e., whose dumps equal the current one
+            A cycle is idle if nothing can commit, issue, rename or be fetched,
+            and no result completes, so nothing wakes up. The streak ends
+            when the next result in flight completes.
+        '''
+        if self.eflag or self.iq.hasReady() or len(self.activeList) == 0:
+            return 0
+        if self.activeList.peek(0).done: # commit or exception
+            return 0
+        numInstrToRename = min(len(self.dir), self.rename_width)
+        if numInstrToRename > 0                        and \
+           self.freeList.available(numInstrToRename)   and \
+           self.activeList.available(numInstrToRename) and \
+           self.iq.available(numInstrToRename):
+            return 0
+        if self.dir.available() and self.pc < len(self.iCache): # fetch
+            return 0
+        completion = self.fu.nextCompletion(self.i2ex1)
+        if completion is None: # nothing in flight at all: never idle-skip a deadlock
+            return 0
+        return completion - 1
+
+    def skip(self, cycles: int = 1) -> None:
+        ''' advance `cycles` <= `idleCycles()` idle cycles without running the stages
+            Only the in-flight latches move; one bundle enters the functional
+            units per cycle, exactly as in `next()`.
+        '''
+        hooks: Hooks | None = self.hooks
+        if hooks is not None:
+            hooks.pre('skip')
+        trace: bool = self.trace.stages
+        for _ in range(cycles):
+            self.bypass = self.fu.ex2()
+            job = self.i2ex1.popleft()
+            self.fu.ex1(job)
+            self.iq.release(job)
+            self.i2ex1.append(self.fu.empty)
+            if trace:
+                self.trace.write('EX2 C EX1 I R&D F&D\n')
+        counters: Counters | None = self.counters
+        if counters is not None: # what `next()` would have counted
+            for _ in range(cycles):
+                counters.sample(len(self.iq), len(self.activeList))
+            if len(self.iq) > 0:
+                counters.stalls['operandsNotReady'] += cycles
+            if len(self.dir) > 0:
+                counters.stalls[self.renameStall()] += cycles
+                if self.pc < len(self.iCache):
+                    counters.stalls['dirNotDrained'] += cycles
+        if hooks is not None:
+            hooks.post('skip')
+
+    def renameStall(self) -> str:
+        ''' stall cause of a rename stage that cannot rename the DIR '''
+        numInstrToRename = min(len(self.dir), self.rename_width)
+        if not self.freeList.available(numInstrToRename):
+            return 'freeListEmpty'
+        elif not self.activeList.available(numInstrToRename):
+            return 'activeListFull'
+        return 'intQFull'
+
+    def __getstate__(self) -> dict[str, Any]:
+        ''' everything but the trace sink and hooks, which are re-attached on restore '''
+        state = self.__dict__.copy()
+        del state['trace']
+        del state['hooks']
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.trace = Trace()
+        self.hooks = None
+
+    def fastForward(self, stopPC: int | None = None, count: int | None = None) -> int:
+        ''' execute functionally up to `stopPC` or for `count` instructions, then
+            continue cycle-accurately from there
+            Only valid before the first cycle. Fast-forwarding stops early in
+            front of an instruction that raises an exception, so that the
+            exception is taken by the detailed pipeline.
+            Returns the number of instructions fast-forwarded.
+        '''
+        if self.pc != 0 or len(self.activeList) != 0 or len(self.dir) != 0:
+            raise RuntimeError('fast-forward only from the initial state')
+        if stopPC is not None and stopPC < 0:
+            raise ValueError('fast-forward PC must not be negative')
+        if count is not None and count < 0:
+            raise ValueError('fast-forward count must not be negative')
+        regs = [self.prf[pr] for pr in self.regMap]
+        self.pc, executed, _ = Functional.run(self.iCache, regs, 0, stopPC, count)
+        # With nothing in flight, architectural register `i` can live in
+        # physical register `i`: the reset register map, busy bit table and
+        # free list are consistent with the fast-forwarded state.
+        for ar, value in enumerate(regs):
+            self.prf[self.regMap[ar]] = value
+        return executed
 
     def predecode(self, idx: int) -> DIREntry:
         ''' predecode instruction '''
-        instruction = self.iCache[idx]
-        op, regs = instruction.split(' ', 1)
-        dest, aRegTag, bRegTag = map(lambda x : x.strip(),
-                                     regs.split(','))
-        isAddi = op == 'addi'
-        return DIREntry(dest=int(dest[1: ]),
-                        op=op,
-                        pc=idx,
-                        aRegTag=int(aRegTag[1: ]),
-                        bRegTag=(None if isAddi else int(bRegTag[1: ])),
-                        bValue=(int(bRegTag) if isAddi else None))
-    def dump(self) -> dict[str, Any]:
-        ''' dump internal state '''
-        def unsign(x: int) -> int:
-            return x % (1 << 64) if x < 0 else x # Why does it work?
+        return self.iCache.decode(idx)
+
+    def inFlight(self, lo: int, hi: int) -> bool:
+        ''' whether an instruction with `lo` <= PC <= `hi` is decoded but not yet
+            committed (or rolled back)
+            The DIR and the active list hold consecutive PCs, so only the
+            oldest and newest instruction in flight need to be checked.
+        '''
+        decoded = self.dir.decodedInstr
+        if len(self.activeList) > 0:
+            oldest = self.activeList.peek(0).pc
+        elif decoded:
+            oldest = decoded[0].pc
+        else:
+            return False
+        newest = decoded[-1].pc if decoded else self.activeList.peek(len(self.activeList) - 1).pc
+        return oldest <= hi and lo <= newest
+
+    def dump(self, fields: Collection[str] | None = None) -> dict[str, Any]:
+        ''' dump internal state, or only the structures named in `fields` '''
+        if fields is None:
+            return {field: dumper(self) for field, dumper in structures.items()}
+        return {field: dumper(self) for field, dumper in structures.items() if field in fields}
+
+    def snapshot(self, fields: Collection[str] | None = None) -> dict[str, Any]:
+        ''' `dump()` in a raw form that is cheaper to take and to compare; see `render()` '''
+        if fields is None:
+            return {field: raw(self) for field, raw in snapshots.items()}
+        return {field: raw(self) for field, raw in snapshots.items() if field in fields}
+
+def unsign(x: int) -> int:
+    return x % (1 << 64) if x < 0 else x # Why does it work?
+
+''' stages of a cycle, in order, as (name, method); see `OoO470.next()` '''
+pipeline: tuple[tuple[str, Callable[[OoO470], bool | None]], ...] = (
+    ('EX2', OoO470.ex2),
+    ('C'  , OoO470.commit),
+    ('EX1', OoO470.ex1),
+    ('I'  , OoO470.issue),
+    ('R&D', OoO470.rename),
+    ('F&D', OoO470.fetch))
+recovery: tuple[tuple[str, Callable[[OoO470], bool | None]], ...] = (
+    ('ROLLBACK', OoO470.recover),)
+
+# per-structure dumps, in `dump()` order
+# lists of immutable ints: a shallow copy suffices
+structures: dict[str, Callable[[OoO470], Any]] = {
+    "ActiveList"          : lambda ooo470: ooo470.activeList.dump(),
+    "BusyBitTable"        : lambda ooo470: ooo470.busy[:],
+    "DecodedPCs"          : lambda ooo470: ooo470.dir.dump(),
+    "Exception"           : lambda ooo470: ooo470.eflag,
+    "ExceptionPC"         : lambda ooo470: ooo470.epc,
+    "FreeList"            : lambda ooo470: ooo470.freeList.dump(),
+    "IntegerQueue"        : lambda ooo470: ooo470.iq.dump(),
+    "PC"                  : lambda ooo470: ooo470.pc,
+    "PhysicalRegisterFile": lambda ooo470: list(map(unsign, ooo470.prf)),
+    "RegisterMapTable"    : lambda ooo470: ooo470.regMap[:]}
+
+# raw structures of `snapshot()`, where they differ from `dump()`: entry
+# lists as PC -> tuple of fields, physical registers as signed ints
+snapshots: dict[str, Callable[[OoO470], Any]] = {
+    **structures,
+    "ActiveList"          : lambda ooo470: ooo470.activeList.rows(),
+    "IntegerQueue"        : lambda ooo470: ooo470.iq.rows(),
+    "PhysicalRegisterFile": lambda ooo470: ooo470.prf[:]}
+renderers: dict[str, Callable[[Any], Any]] = {
+    "ActiveList"          : ActiveList.render,
+    "IntegerQueue"        : IntQ.render,
+    "PhysicalRegisterFile": lambda values: list(map(unsign, values))}
 
-        return {"ActiveList": self.activeList.dump(),
-                "BusyBitTable": deepcopy(self.busy),
-                "DecodedPCs": self.dir.dump(),
-                "Exception": self.eflag,
-                "ExceptionPC": self.epc,
-                "FreeList": self.freeList.dump(),
-                "IntegerQueue": self.iq.dump(),
-                "PC": self.pc,
-                "PhysicalRegisterFile": list(map(unsign, deepcopy(self.prf))),
-                "RegisterMapTable": deepcopy(self.regMap)}
+def render(field: str, raw: Any) -> Any:
+    ''' the `dump()` form of `snapshot()[field]`, or of any part of it:
+        a sub-list of a list, or a sub-dict of an entry list
+    '''
+    renderer = renderers.get(field)
+    return raw if renderer is None else renderer(raw)
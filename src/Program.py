@@ -0,0 +1,177 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any
+
+from DIR import DIREntry
+from ISA import Op, opcodes, num_ar
+
+ops: tuple[Op] = tuple(Op) # opcode -> Op without going through the enum constructor
+
+''' binary program format (little endian)
+
+    header: magic, format version, instruction count (`header`)
+    then one column per field, each `count` entries long:
+        op, dest, aReg, bReg: uint8
+        padding to a multiple of 8 bytes
+        imm: int64
+    The columns are mapped into memory and used in place.
+'''
+magic  : bytes         = b'OoO470P\x00'
+version: int           = 1
+header : struct.Struct = struct.Struct('<8sII')
+
+
+''' pre-decoded instruction memory '''
+class Program:
+    def __init__(self, instructions: list[str]) -> None:
+        ''' decode the whole program once; malformed instructions are rejected here '''
+        self.op  : array = array('B') # Op
+        self.dest: array = array('B') # logical destination register
+        self.aReg: array = array('B') # logical source register
+        self.bReg: array = array('B') # logical source register, 0 for `addi`
+        self.imm : list[int] = [] # immediate, 0 unless `addi`; any size, as in the ISA
+        if not isinstance(instructions, list):
+            raise ValueError('program must be a JSON list of instruction strings')
+        for idx, instruction in enumerate(instructions):
+            try:
+                op, dest, aReg, bReg, imm = self.parse(instruction)
+            except ValueError as e:
+                raise ValueError(f'instruction {idx}: {e}: {instruction!r:.80}') from None
+            self.op.append(op)
+            self.dest.append(dest)
+            self.aReg.append(aReg)
+            self.bReg.append(bReg)
+            self.imm.append(imm)
+
+    @staticmethod
+    def parse(instruction: str) -> tuple[Op, int, int, int, int]:
+        def register(operand: str) -> int:
+            if not (operand.startswith('x') and operand[1: ].isdecimal()):
+                raise ValueError(f'bad register {operand!r}')
+            reg = int(operand[1: ])
+            if reg >= num_ar:
+                raise ValueError(f'register {operand!r} out of range')
+            return reg
+
+        if not isinstance(instruction, str):
+            raise ValueError('not a string')
+        mnemonic, _, operands = instruction.strip().partition(' ')
+        if mnemonic not in opcodes:
+            raise ValueError(f'unknown opcode {mnemonic!r}')
+        op = opcodes[mnemonic]
+        regs = [x.strip() for x in operands.split(',')]
+        if len(regs) != 3:
+            raise ValueError(f'expected 3 operands, got {len(regs)}')
+        if op == Op.ADDI:
+            imm = int(regs[2])
+            return op, register(regs[0]), register(regs[1]), 0, imm
+        return op, register(regs[0]), register(regs[1]), register(regs[2]), 0
+
+    def __len__(self) -> int:
+        return len(self.op)
+
+    @staticmethod
+    def load(path: str) -> 'Program':
+        ''' binary programs are memory-mapped, anything else is parsed as JSON '''
+        if Program.isBinary(path):
+            return MappedProgram(path)
+        with open(path, 'r') as fin:
+            return Program(json.load(fin))
+
+    @staticmethod
+    def isBinary(path: str) -> bool:
+        ''' whether `path` holds a program in the binary format '''
+        with open(path, 'rb') as fin:
+            return fin.read(len(magic)) == magic
+
+    def save(self, path: str) -> None:
+        ''' write the binary format, whose immediates are 64-bit signed '''
+        count = len(self)
+        for idx, value in enumerate(self.imm):
+            if not -(1 << 63) <= value < (1 << 63):
+                raise ValueError(f'instruction {idx}: immediate {value} does not fit the binary format')
+        imm = array('q', self.imm)
+        if sys.byteorder != 'little':
+            imm.byteswap()
+        with open(path, 'wb') as fout:
+            fout.write(header.pack(magic, version, count))
+            for column in (self.op, self.dest, self.aReg, self.bReg):
+                fout.write(bytes(column))
+            fout.write(bytes(-(header.size + 4 * count) % 8))
+            fout.write(imm.tobytes())
+
+    def decode(self, idx: int) -> DIREntry:
+        return self.fetch(idx, idx + 1)[0]
+
+    def fetch(self, start: int, stop: int, records: list[DIREntry] | None = None) -> list[DIREntry]:
+        ''' decoded instructions [start, stop), written into `records` if given '''
+        stop = min(stop, len(self))
+        if records is None:
+            return [DIREntry(dest=dest,
+                             op=ops[op],
+                             pc=pc,
+                             aRegTag=aReg,
+                             bRegTag=(None if op == Op.ADDI else bReg),
+                             bValue=(imm if op == Op.ADDI else None))
+                    for pc, op, dest, aReg, bReg, imm in zip(range(start, stop),
+                                                             self.op[start:stop],
+                                                             self.dest[start:stop],
+                                                             self.aReg[start:stop],
+                                                             self.bReg[start:stop],
+                                                             self.imm[start:stop])]
+        for record, pc in zip(records, range(start, stop)):
+            op = self.op[pc]
+            record.dest = self.dest[pc]
+            record.op = ops[op]
+            record.pc = pc
+            record.aRegTag = self.aReg[pc]
+            record.bRegTag = None if op == Op.ADDI else self.bReg[pc]
+            record.bValue = self.imm[pc] if op == Op.ADDI else None
+        return records[: max(stop - start, 0)]
+
+''' memory-mapped binary program '''
+class MappedProgram(Program):
+    def __init__(self, path: str) -> None:
+        ''' map `path`; only the header, size and field ranges are checked '''
+        self.path: str = path
+        with open(path, 'rb') as fin:
+            self.buffer: mmap.mmap = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < header.size:
+            raise ValueError('truncated header')
+        tag, fileVersion, count = header.unpack_from(self.buffer)
+        if tag != magic or fileVersion != version:
+            raise ValueError(f'not an OoO470 binary program (version {version})')
+        immOffset = header.size + 4 * count + (-(header.size + 4 * count) % 8)
+        if len(self.buffer) != immOffset + 8 * count:
+            raise ValueError(f'size does not match instruction count {count}')
+
+        view = memoryview(self.buffer)
+        columns = [view[header.size + i * count: header.size + (i + 1) * count] for i in range(4)]
+        self.op, self.dest, self.aReg, self.bReg = columns
+        if sys.byteorder == 'little':
+            self.imm = view[immOffset: ].cast('q')
+        else:
+            imm = array('q')
+            imm.frombytes(view[immOffset: ])
+            imm.byteswap()
+            self.imm = imm
+        # Reject what would otherwise crash mid-run. This scans the columns
+        # once without materializing the program.
+        if count > 0:
+            if max(self.op) >= len(ops):
+                raise ValueError(f'instruction {self.op.tobytes().index(max(self.op))}: '
+                                 f'unknown opcode {max(self.op)}')
+            for name, column in zip(('dest', 'aReg', 'bReg'), (self.dest, self.aReg, self.bReg)):
+                if max(column) >= num_ar:
+                    raise ValueError(f'instruction {column.tobytes().index(max(column))}: '
+                                     f'{name} register x{max(column)} out of range')
+
+    def __getstate__(self) -> dict[str, Any]:
+        ''' pickled by path, e.g., in checkpoints '''
+        return {'path': self.path}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state['path'])
@@ -0,0 +1,150 @@
+import json
+from typing import Any, Iterable, Iterator
+
+from OoO470 import render
+
+
+''' delta-encoded cycle snapshots
+
+    A delta log is a sequence of records, one per cycle:
+        {"Cycle": n, "Keyframe": {...full state...}}
+        {"Cycle": n, "Delta": {field: new value, ...},
+                     "Patch": {field: [[index, new value], ...], ...},
+                     "Entries": {field: [[PC, new entry or null], ...], ...}}
+    `Delta` replaces whole fields; `Patch` updates individual elements of
+    flat lists (busy bit table, physical RF, register map); `Entries` adds,
+    updates (entry) or removes (null) the entries of the active list and
+    integer queue by PC. Both lists are in program order, i.e., sorted by
+    PC. Any key but "Cycle" is omitted when empty.
+'''
+patchable: tuple[str] = ('BusyBitTable', 'PhysicalRegisterFile', 'RegisterMapTable')
+keyed    : tuple[str] = ('ActiveList', 'IntegerQueue')
+
+class DeltaEncoder:
+    def __init__(self, keyframe: int = 64) -> None:
+        if keyframe < 1:
+            raise ValueError('keyframe interval must be positive')
+        self.keyframe: int = keyframe # a full state every `keyframe` records
+        self.prev : dict[str, Any] | None = None
+        self.count: int = 0
+
+    def encode(self, cycle: int, state: dict[str, Any]) -> dict[str, Any]:
+        ''' `state` is an `OoO470.snapshot()`, owned by the encoder afterwards
+            Only the structures that changed are rendered to their dumped form.
+        '''
+        prev = self.prev
+        self.prev = state
+        self.count += 1
+        if prev is None or (self.count - 1) % self.keyframe == 0:
+            return {'Cycle': cycle,
+                    'Keyframe': {field: render(field, value) for field, value in state.items()}}
+
+        delta: dict[str, Any] = {}
+        patch: dict[str, list] = {}
+        entries: dict[str, list] = {}
+        for field, value in state.items():
+            old = prev.get(field)
+            if value == old:
+                continue
+            if field in patchable and len(value) == len(old):
+                changed = [idx for idx, (new, was) in enumerate(zip(value, old)) if new != was]
+                if 2 * len(changed) < len(value):
+                    patch[field] = [list(change) for change in
+                                    zip(changed, render(field, [value[idx] for idx in changed]))]
+                    continue
+            elif field in keyed and old is not None:
+                removed = [[pc, None] for pc in old if pc not in value]
+                changed = {pc: row for pc, row in value.items() if old.get(pc) != row}
+                if 2 * (len(removed) + len(changed)) < len(value):
+                    entries[field] = removed + [list(change) for change in
+                                                zip(changed, render(field, changed))]
+                    continue
+            delta[field] = render(field, value)
+        record: dict[str, Any] = {'Cycle': cycle}
+        if delta:
+            record['Delta'] = delta
+        if patch:
+            record['Patch'] = patch
+        if entries:
+            record['Entries'] = entries
+        return record
+
+class DeltaDecoder:
+    def __init__(self) -> None:
+        self.state: dict[str, Any] | None = None
+
+    def apply(self, record: dict[str, Any]) -> dict[str, Any]:
+        ''' advance to `record` and return the full state of its cycle
+            The returned state is shared with the decoder; copy before mutating.
+        '''
+        if 'Keyframe' in record:
+            self.state = {field: (list(value) if field in patchable else value)
+                          for field, value in record['Keyframe'].items()}
+            return self.state
+        if self.state is None:
+            raise ValueError(f'cycle {record["Cycle"]}: delta without preceding keyframe')
+        self.state.update(record.get('Delta', {}))
+        for field, changes in record.get('Patch', {}).items():
+            value = self.state[field] = list(self.state[field])
+            for idx, new in changes:
+                value[idx] = new
+        for field, changes in record.get('Entries', {}).items():
+            byPC = {entry['PC']: entry for entry in self.state[field]}
+            for pc, entry in changes:
+                if entry is None:
+                    del byPC[pc]
+                else:
+                    byPC[pc] = entry
+            self.state[field] = [byPC[pc] for pc in sorted(byPC)]
+        return self.state
+
+def expand(records: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    ''' rebuild the full per-cycle states (the non-delta log format) '''
+    decoder = DeltaDecoder()
+    for record in records:
+        yield dict(decoder.apply(record))
+
+def stateAt(records: list[dict[str, Any]], cycle: int) -> dict[str, Any]:
+    ''' full state of `cycle`, replayed from the nearest preceding keyframe '''
+    end = next((idx for idx, record in enumerate(records) if record['Cycle'] == cycle), None)
+    if end is None:
+        raise KeyError(f'cycle {cycle} not in log')
+    start = end
+    while 'Keyframe' not in records[start]:
+        if start == 0:
+            raise ValueError(f'cycle {cycle}: no preceding keyframe')
+        start -= 1
+    decoder = DeltaDecoder()
+    for record in records[start:end + 1]:
+        state = decoder.apply(record)
+    return dict(state)
+
+def load(path: str) -> list[dict[str, Any]]:
+    ''' read a delta log written in any `LogWriter` format '''
+    with open(path, 'r') as fin:
+        text = fin.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line]
+
+if __name__ == '__main__':
+    import argparse
+
+    from LogWriter import LogWriter
+
+    parser = argparse.ArgumentParser(description='expand a delta log to the full per-cycle format')
+    parser.add_argument('inPath')
+    parser.add_argument('outPath')
+    parser.add_argument('--format', choices=LogWriter.formats, default='json')
+    parser.add_argument('--cycle', type=int, default=None,
+                        help='only reconstruct the state of this cycle')
+    args = parser.parse_args()
+
+    records = load(args.inPath)
+    with open(args.outPath, 'w') as fout:
+        if args.cycle is not None:
+            json.dump(stateAt(records, args.cycle), fout, indent=4)
+        else:
+            with LogWriter(fout, args.format) as log:
+                for state in expand(records):
+                    log.write(state)
@@ -0,0 +1,43 @@
+import sys
+from typing import TextIO
+
+
+''' pipeline trace sink '''
+class Trace:
+    OFF  : int = 0
+    CYCLE: int = 1 # cycle numbers only
+    STAGE: int = 2 # cycle numbers and the stages run in each cycle
+    levels: dict[str, int] = {'off': OFF, 'cycle': CYCLE, 'stage': STAGE}
+
+    def __init__(self, level: int = OFF, fout: TextIO | None = None,
+                       bufsize: int = 1 << 12) -> None:
+        self.level  : int    = level
+        # Emitters test these flags before building any text, so a disabled
+        # trace costs one attribute lookup per trace point.
+        self.cycles : bool   = level >= self.CYCLE
+        self.stages : bool   = level >= self.STAGE
+        self.fout   : TextIO = sys.stdout if fout is None else fout
+        self.bufsize: int    = bufsize # flush after this many writes
+        self.buffer : list[str] = []
+
+    def write(self, text: str) -> None:
+        self.buffer.append(text)
+        if len(self.buffer) >= self.bufsize:
+            self.flush()
+
+    def cycle(self, cycle: int) -> None:
+        ''' start the trace line of `cycle`; stage names follow on the same line '''
+        if self.cycles:
+            self.write(f'cycle {cycle:02d}' +
+                       (' ' if self.stages and cycle > 0 else '\n'))
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.fout.write(''.join(self.buffer))
+            self.buffer.clear()
+        self.fout.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.fout is not sys.stdout:
+            self.fout.close()
@@ -0,0 +1,456 @@
+from collections import deque
+from typing import Any
+
+import numpy as np
+
+from Config  import MachineConfig
+from ISA     import Op, mnemonics, num_ar
+from Program import Program
+
+
+''' lockstep simulation of many independent OoO470 instances
+
+    Every structure of `OoO470` becomes an array with a leading program axis,
+    so one numpy operation advances the same stage of all N programs. Queues
+    are fixed-size arrays with head/count indices, and finished programs are
+    masked out. Register values are kept in object arrays of Python ints,
+    which gives exactly the (unbounded) arithmetic of the scalar model.
+    Results, including every per-cycle dump, are identical to `OoO470`.
+'''
+class VectorOoO470:
+    exceptionPC: int = 0x10000
+
+    def __init__(self, programs: list[Program], config: MachineConfig | None = None) -> None:
+        self.config: MachineConfig = MachineConfig() if config is None else config
+        if self.config.units is not None:
+            raise ValueError('only the default functional units (MachineConfig.units = None)')
+        N = self.size = len(programs)
+        F, W, Q = self.config.fetchWidth, self.config.issueWidth, self.config.intQSize
+        A, P    = self.config.activeListSize, self.config.numPR
+        self.rows: np.ndarray = np.arange(N)
+        # instruction memory, padded to the longest program
+        self.length: np.ndarray = np.array([len(program) for program in programs], dtype=np.int64)
+        L = max(1, int(self.length.max(initial=0)))
+        self.iOp  : np.ndarray = np.zeros((N, L), dtype=np.int64)
+        self.iDest: np.ndarray = np.zeros((N, L), dtype=np.int64)
+        self.iA   : np.ndarray = np.zeros((N, L), dtype=np.int64)
+        self.iB   : np.ndarray = np.zeros((N, L), dtype=np.int64)
+        self.iImm : np.ndarray = np.zeros((N, L), dtype=object)
+        for n, program in enumerate(programs):
+            k = len(program)
+            self.iOp  [n, :k] = np.asarray(program.op)
+            self.iDest[n, :k] = np.asarray(program.dest)
+            self.iA   [n, :k] = np.asarray(program.aReg)
+            self.iB   [n, :k] = np.asarray(program.bReg)
+            self.iImm [n, :k] = [int(imm) for imm in program.imm]
+
+        self.pc: np.ndarray = np.zeros(N, dtype=np.int64)
+        # F&D: DIR
+        self.dir: dict[str, np.ndarray] = {'op'  : np.zeros((N, F), dtype=np.int64),
+                                           'dest': np.zeros((N, F), dtype=np.int64),
+                                           'aReg': np.zeros((N, F), dtype=np.int64),
+                                           'bReg': np.zeros((N, F), dtype=np.int64),
+                                           'imm' : np.zeros((N, F), dtype=object),
+                                           'pc'  : np.zeros((N, F), dtype=np.int64)}
+        self.dirHead : np.ndarray = np.zeros(N, dtype=np.int64)
+        self.dirCount: np.ndarray = np.zeros(N, dtype=np.int64)
+        # R&D: free list (circular), register map, busy bit table, physical RF
+        self.free: np.ndarray = np.zeros((N, P), dtype=np.int64)
+        self.free[:, :P - num_ar] = np.arange(num_ar, P)
+        self.freeHead : np.ndarray = np.zeros(N, dtype=np.int64)
+        self.freeCount: np.ndarray = np.full(N, P - num_ar, dtype=np.int64)
+        self.regMap: np.ndarray = np.tile(np.arange(num_ar, dtype=np.int64), (N, 1))
+        self.busy  : np.ndarray = np.zeros((N, P), dtype=bool)
+        self.prf   : np.ndarray = np.zeros((N, P), dtype=object)
+        # integer queue, compacted in program order: entries [0, iqCount) are valid
+        self.iq: dict[str, np.ndarray] = {'dest'  : np.zeros((N, Q), dtype=np.int64),
+                                          'op'    : np.zeros((N, Q), dtype=np.int64),
+                                          'pc'    : np.zeros((N, Q), dtype=np.int64),
+                                          'aReady': np.zeros((N, Q), dtype=bool),
+                                          'aTag'  : np.zeros((N, Q), dtype=np.int64),
+                                          'aValue': np.zeros((N, Q), dtype=object),
+                                          'bReady': np.zeros((N, Q), dtype=bool),
+                                          'bTag'  : np.zeros((N, Q), dtype=np.int64),
+                                          'bValue': np.zeros((N, Q), dtype=object)}
+        self.iqCount: np.ndarray = np.zeros(N, dtype=np.int64)
+        # I, EX: bundles of `issueWidth` slots per program
+        self.i2ex1  : deque[dict[str, np.ndarray]] = deque()
+        self.ex12ex2: deque[dict[str, np.ndarray]] = deque()
+        self.bypass : dict[str, np.ndarray] = self.results(np.zeros((N, W), dtype=bool))
+        # C: active list (circular)
+        self.al: dict[str, np.ndarray] = {'done'       : np.zeros((N, A), dtype=bool),
+                                          'exception'  : np.zeros((N, A), dtype=bool),
+                                          'logicalDest': np.zeros((N, A), dtype=np.int64),
+                                          'oldDest'    : np.zeros((N, A), dtype=np.int64),
+                                          'pc'         : np.zeros((N, A), dtype=np.int64)}
+        self.alHead : np.ndarray = np.zeros(N, dtype=np.int64)
+        self.alCount: np.ndarray = np.zeros(N, dtype=np.int64)
+        # exception recovery
+        self.eflag   : np.ndarray = np.zeros(N, dtype=bool)
+        self.halt    : np.ndarray = np.zeros(N, dtype=bool)
+        self.epc     : np.ndarray = np.zeros(N, dtype=np.int64)
+        # lockstep bookkeeping: a finished program keeps the state of its last cycle
+        self.finished: np.ndarray = np.zeros(N, dtype=bool)
+        self.cycles  : np.ndarray = np.zeros(N, dtype=np.int64) # cycle in which `next()` returned True
+        self.cycle   : int = 0
+
+    def results(self, valid: np.ndarray) -> dict[str, np.ndarray]:
+        ''' empty EX result bundle '''
+        shape = valid.shape
+        return {'valid'    : valid,
+                'dest'     : np.zeros(shape, dtype=np.int64),
+                'pc'       : np.zeros(shape, dtype=np.int64),
+                'result'   : np.zeros(shape, dtype=object),
+                'exception': np.zeros(shape, dtype=bool)}
+
+    def next(self) -> bool:
+        ''' advance every unfinished program by one cycle; True when all have finished '''
+        self.cycle += 1
+        normal    = ~self.finished & ~self.eflag
+        exception = ~self.finished &  self.eflag
+        # EX2
+        completed: dict[str, np.ndarray] | None = None
+        if len(self.ex12ex2) >= self.config.aluDepth - 1 and self.ex12ex2:
+            completed = self.ex12ex2.popleft()
+            self.bypass = completed
+        # C
+        reset = self.commit(normal)
+        normal &= ~reset
+        if completed is not None:
+            self.complete(completed, normal)
+        # EX1
+        if self.i2ex1:
+            self.ex1(self.i2ex1.popleft())
+        # I
+        self.issue(normal)
+        # R&D
+        self.rename(normal)
+        # F&D
+        self.fetch(normal)
+        # exception mode
+        self.rollback(exception)
+        return bool(self.finished.all())
+
+    def run(self) -> np.ndarray:
+        ''' simulate all programs to completion; returns the cycle count of each '''
+        while not self.next():
+            pass
+        return self.cycles
+
+    def commit(self, active: np.ndarray) -> np.ndarray:
+        ''' retire done instructions in order; returns the programs taking an exception '''
+        A, R = self.config.activeListSize, self.free.shape[1]
+        rows = self.rows
+        going = active.copy()
+        num_commit = np.zeros(self.size, dtype=np.int64)
+        reset = np.zeros(self.size, dtype=bool)
+        for k in range(self.config.commitWidth):
+            going &= self.alCount > k
+            if not going.any():
+                break
+            slot = (self.alHead + k) % A
+            exc  = going & self.al['exception'][rows, slot]
+            done = going & self.al['done'][rows, slot] & ~exc
+            if exc.any():
+                reset |= exc
+                self.epc[exc] = self.al['pc'][rows[exc], slot[exc]]
+            if done.any(): # update free list
+                n = rows[done]
+                self.free[n, (self.freeHead[n] + self.freeCount[n]) % R] = self.al['oldDest'][n, slot[done]]
+                self.freeCount[n] += 1
+                num_commit[n] += 1
+            going = done
+        # delete active list entries, also those committed before an exception
+        self.alHead = (self.alHead + num_commit) % A
+        self.alCount -= num_commit
+        if reset.any():
+            self.eflag[reset] = True
+            self.pc[reset] = self.exceptionPC
+            self.dirCount[reset] = 0
+            self.iqCount[reset] = 0
+            # their in-flight ALU results are masked out from now on
+        return reset
+
+    def complete(self, completed: dict[str, np.ndarray], active: np.ndarray) -> None:
+        ''' mark finished instructions done
+            The active list holds consecutive PCs, so an instruction's slot
+            follows from its distance to the head.
+        '''
+        A = self.config.activeListSize
+        valid = completed['valid'] & active[:, None]
+        if not valid.any():
+            return
+        n, w = np.nonzero(valid)
+        headPC = self.al['pc'][n, self.alHead[n]]
+        slot = (self.alHead[n] + completed['pc'][n, w] - headPC) % A
+        self.al['done'][n, slot] = True
+        self.al['exception'][n, slot] = completed['exception'][n, w]
+
+    def ex1(self, job: dict[str, np.ndarray]) -> None:
+        results = self.results(job['valid'])
+        results['dest'] = job['dest']
+        results['pc'] = job['pc']
+        op, a, b = job['op'], job['aValue'], job['bValue']
+        for code, compute in ((Op.ADD , lambda a, b: a + b),
+                              (Op.ADDI, lambda a, b: a + b),
+                              (Op.SUB , lambda a, b: a - b),
+                              (Op.MULU, lambda a, b: a * b),
+                              (Op.DIVU, lambda a, b: a // b),
+                              (Op.REMU, lambda a, b: a % b)):
+            mask = job['valid'] & (op == code)
+            if not mask.any():
+                continue
+            if code == Op.DIVU or code == Op.REMU:
+                zero = mask & (b == 0)
+                results['exception'][zero] = True
+                mask &= ~zero
+            results['result'][mask] = compute(a[mask], b[mask])
+        self.ex12ex2.append(results)
+
+    def issue(self, active: np.ndarray) -> None:
+        ''' wake up operands with bypassed results, then issue the oldest ready entries '''
+        W, Q = self.config.issueWidth, self.config.intQSize
+        iq = self.iq
+        valid = (np.arange(Q) < self.iqCount[:, None]) & active[:, None]
+        bypass = self.bypass
+        for k in range(bypass['valid'].shape[1]):
+            forwarding = bypass['valid'][:, k] & ~bypass['exception'][:, k] & active
+            if not forwarding.any():
+                continue
+            dest   = bypass['dest'][:, k, None]
+            result = np.broadcast_to(bypass['result'][:, k, None], valid.shape)
+            for operand in ('a', 'b'):
+                match = valid & forwarding[:, None] & ~iq[operand + 'Ready'] & (iq[operand + 'Tag'] == dest)
+                iq[operand + 'Value'][match] = result[match]
+                iq[operand + 'Tag'][match] = 0
+                iq[operand + 'Ready'][match] = True
+
+        ready = valid & iq['aReady'] & iq['bReady']
+        selected = ready & (np.cumsum(ready, axis=1) <= W)
+        num_issue = selected.sum(axis=1)
+        # selected entries first, in program order
+        order = np.argsort(~selected, axis=1, kind='stable')[:, :W]
+        slots = order.shape[1]
+        bundle = {'valid': np.zeros(valid.shape[:1] + (W,), dtype=bool)}
+        bundle['valid'][:, :slots] = np.arange(slots) < num_issue[:, None]
+        for field, dtype in (('dest', np.int64), ('pc', np.int64), ('op', np.int64),
+                             ('aValue', object), ('bValue', object)):
+            bundle[field] = np.zeros((self.size, W), dtype=dtype)
+            bundle[field][:, :slots] = np.take_along_axis(iq[field], order, axis=1)
+        bundle['aValue'] = np.where(bundle['valid'], bundle['aValue'], 0)
+        bundle['bValue'] = np.where(bundle['valid'], bundle['bValue'], 0)
+        self.i2ex1.append(bundle)
+        # remove issued entries, keeping the rest in program order
+        if num_issue.any():
+            keep = (np.arange(Q) < self.iqCount[:, None]) & ~selected
+            order = np.argsort(~keep, axis=1, kind='stable')
+            for field in iq:
+                iq[field] = np.take_along_axis(iq[field], order, axis=1)
+            self.iqCount -= num_issue
+
+    def rename(self, active: np.ndarray) -> None:
+        A, Q, R = self.config.activeListSize, self.config.intQSize, self.free.shape[1]
+        rows, iq, al, dir = self.rows, self.iq, self.al, self.dir
+        # bypassed results update the busy bit table and physical RF
+        bypass = self.bypass
+        for k in range(bypass['valid'].shape[1]):
+            forwarding = bypass['valid'][:, k] & ~bypass['exception'][:, k] & active
+            if forwarding.any():
+                n = rows[forwarding]
+                dest = bypass['dest'][n, k]
+                self.prf[n, dest] = bypass['result'][n, k]
+                self.busy[n, dest] = False
+        # all or nothing, as in `OoO470`
+        num_rename = np.minimum(self.dirCount, self.config.renameWidth)
+        renaming = active & (self.freeCount >= num_rename) & \
+                            (A - self.alCount >= num_rename) & \
+                            (Q - self.iqCount >= num_rename)
+        for j in range(self.config.renameWidth):
+            lane = renaming & (num_rename > j)
+            if not lane.any():
+                break
+            n = rows[lane]
+            slot = self.dirHead[n] + j
+            op, dest, pc = dir['op'][n, slot], dir['dest'][n, slot], dir['pc'][n, slot]
+            # rename
+            new = self.free[n, self.freeHead[n]]
+            self.freeHead[n] = (self.freeHead[n] + 1) % R
+            self.freeCount[n] -= 1
+            self.busy[n, new] = True
+            # active list before register map: `oldDest`
+            tail = (self.alHead[n] + self.alCount[n]) % A
+            al['done'][n, tail] = False
+            al['exception'][n, tail] = False
+            al['logicalDest'][n, tail] = dest
+            al['oldDest'][n, tail] = self.regMap[n, dest]
+            al['pc'][n, tail] = pc
+            self.alCount[n] += 1
+            # dispatch before register map: source tags
+            prsA = self.regMap[n, dir['aReg'][n, slot]]
+            prsB = self.regMap[n, dir['bReg'][n, slot]]
+            busyA = self.busy[n, prsA]
+            immB = op == Op.ADDI
+            busyB = self.busy[n, prsB] & ~immB
+            tail = self.iqCount[n]
+            iq['dest'][n, tail] = new
+            iq['op'][n, tail] = op
+            iq['pc'][n, tail] = pc
+            iq['aReady'][n, tail] = ~busyA
+            iq['aTag'][n, tail] = np.where(busyA, prsA, 0)
+            iq['aValue'][n, tail] = np.where(busyA, 0, self.prf[n, prsA])
+            iq['bReady'][n, tail] = ~busyB
+            iq['bTag'][n, tail] = np.where(busyB, prsB, 0)
+            iq['bValue'][n, tail] = np.where(immB, dir['imm'][n, slot],
+                                             np.where(busyB, 0, self.prf[n, prsB]))
+            self.iqCount[n] += 1
+            self.regMap[n, dest] = new
+        self.dirHead += np.where(renaming, num_rename, 0)
+        self.dirCount -= np.where(renaming, num_rename, 0)
+
+    def fetch(self, active: np.ndarray) -> None:
+        F = self.config.fetchWidth
+        available = active & (self.dirCount == 0)
+        end = available & (self.pc >= self.length)
+        stop = end & (self.alCount == 0)
+        self.finished |= stop
+        self.cycles[stop] = self.cycle
+        fetching = available & ~end
+        if not fetching.any():
+            return
+        n = self.rows[fetching]
+        count = np.minimum(F, self.length[n] - self.pc[n])
+        idx = np.minimum(self.pc[n, None] + np.arange(F), self.iOp.shape[1] - 1)
+        for field, memory in (('op', self.iOp), ('dest', self.iDest), ('aReg', self.iA),
+                              ('bReg', self.iB), ('imm', self.iImm)):
+            self.dir[field][n] = np.take_along_axis(memory[n], idx, axis=1)
+        self.dir['pc'][n] = self.pc[n, None] + np.arange(F)
+        self.dirHead[n] = 0
+        self.dirCount[n] = count
+        self.pc[n] += count
+
+    def rollback(self, exception: np.ndarray) -> None:
+        A, R = self.config.activeListSize, self.free.shape[1]
+        rows, al = self.rows, self.al
+        rolling = exception & ~self.halt
+        for _ in range(self.config.renameWidth):
+            rolling &= self.alCount > 0
+            if not rolling.any():
+                break
+            n = rows[rolling]
+            last = (self.alHead[n] + self.alCount[n] - 1) % A # reverse program order
+            logicalDest = al['logicalDest'][n, last]
+            released = self.regMap[n, logicalDest]
+            self.regMap[n, logicalDest] = al['oldDest'][n, last]
+            self.busy[n, released] = False
+            self.free[n, (self.freeHead[n] + self.freeCount[n]) % R] = released
+            self.freeCount[n] += 1
+            self.alCount[n] -= 1
+        empty = exception & (self.alCount == 0)
+        stop = empty & self.halt # exception recovered last cycle
+        self.eflag[stop] = False
+        self.finished |= stop
+        self.cycles[stop] = self.cycle
+        self.halt |= empty       # exception just recovered this cycle
+
+    def dump(self, n: int) -> dict[str, Any]:
+        ''' internal state of program `n`, in the format of `OoO470.dump()` '''
+        def unsign(x: int) -> int:
+            return x % (1 << 64) if x < 0 else x
+
+        A, R = self.config.activeListSize, self.free.shape[1]
+        al, iq = self.al, self.iq
+        alSlots = ((self.alHead[n] + np.arange(self.alCount[n])) % A).tolist()
+        dirSlots = range(self.dirHead[n], self.dirHead[n] + self.dirCount[n])
+        freeSlots = (self.freeHead[n] + np.arange(self.freeCount[n])) % R
+        return {"ActiveList": [{'Done': bool(al['done'][n, slot]),
+                                'Exception': bool(al['exception'][n, slot]),
+                                'LogicalDestination': int(al['logicalDest'][n, slot]),
+                                'OldDestination': int(al['oldDest'][n, slot]),
+                                'PC': int(al['pc'][n, slot])} for slot in alSlots],
+                "BusyBitTable": self.busy[n].tolist(),
+                "DecodedPCs": [int(self.dir['pc'][n, slot]) for slot in dirSlots],
+                "Exception": bool(self.eflag[n]),
+                "ExceptionPC": int(self.epc[n]),
+                "FreeList": self.free[n, freeSlots].tolist(),
+                "IntegerQueue": [{'DestRegister': int(iq['dest'][n, idx]),
+
+                                  'OpAIsReady': bool(iq['aReady'][n, idx]),
+                                  'OpARegTag': int(iq['aTag'][n, idx]),
+                                  'OpAValue': unsign(iq['aValue'][n, idx]),
+
+                                  'OpBIsReady': bool(iq['bReady'][n, idx]),
+                                  'OpBRegTag': int(iq['bTag'][n, idx]),
+                                  'OpBValue': unsign(iq['bValue'][n, idx]),
+
+                                  'OpCode': mnemonics[Op.ADD if iq['op'][n, idx] == Op.ADDI
+                                                             else iq['op'][n, idx]],
+                                  'PC': int(iq['pc'][n, idx])} for idx in range(self.iqCount[n])],
+                "PC": int(self.pc[n]),
+                "PhysicalRegisterFile": [unsign(x) for x in self.prf[n].tolist()],
+                "RegisterMapTable": self.regMap[n].tolist()}
+
+def verify(programs: list[Program], config: MachineConfig | None = None) -> list[int]:
+    ''' differential check against the scalar model: every program's dump,
+        every cycle; returns the indices of programs that diverge
+    '''
+    from OoO470 import OoO470
+
+    expected: list[list[dict[str, Any]]] = []
+    for program in programs:
+        ooo470 = OoO470(program, config=config)
+        log = [ooo470.dump()]
+        stop = False
+        while not stop:
+            stop = ooo470.next()
+            log.append(ooo470.dump())
+        expected.append(log)
+
+    vector = VectorOoO470(programs, config)
+    diverged: set[int] = {n for n in range(len(programs)) if vector.dump(n) != expected[n][0]}
+    stop = len(programs) == 0
+    while not stop:
+        running = ~vector.finished
+        stop = vector.next()
+        for n in np.flatnonzero(running).tolist():
+            if n not in diverged and (vector.cycle >= len(expected[n]) or
+                                      vector.dump(n) != expected[n][vector.cycle]):
+                diverged.add(n)
+    for n in range(len(programs)):
+        if vector.cycles[n] != len(expected[n]) - 1:
+            diverged.add(n)
+    return sorted(diverged)
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description='simulate many programs in lockstep with numpy')
+    parser.add_argument('inputs', nargs='+', help='program files (JSON or binary)')
+    parser.add_argument('--verify', action='store_true',
+                        help='compare every cycle of every program against the scalar model')
+    MachineConfig.addArguments(parser)
+    args = parser.parse_args()
+
+    try:
+        config = MachineConfig.fromArgs(args)
+        if config.units is not None:
+            raise ValueError('functional unit tables are not supported by the vector engine')
+        programs = [Program.load(path) for path in args.inputs]
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+    if args.verify:
+        diverged = verify(programs, config)
+        for n in diverged:
+            print(f'{args.inputs[n]}: DIVERGES from OoO470')
+        print(f'{len(programs) - len(diverged)}/{len(programs)} programs identical to OoO470')
+        sys.exit(1 if diverged else 0)
+
+    start = time.perf_counter()
+    vector = VectorOoO470(programs, config)
+    cycles = vector.run()
+    wall = time.perf_counter() - start
+    for n, path in enumerate(args.inputs):
+        print(f'{path}  {cycles[n]} cycles' +
+              (f'  exception PC {vector.epc[n]}' if vector.halt[n] else ''))
+    print(f'{len(programs)} programs, {wall:.3f} s wall')
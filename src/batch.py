@@ -0,0 +1,132 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
+
+from Config     import MachineConfig
+from DumpPolicy import DumpPolicy
+from main       import addLogArguments, load, logKeyframe, simulate
+from Program    import Program
+
+def outputPath(inPath: str, suffix: str) -> str:
+    ''' foo.json -> foo<suffix>, foo.bin -> foo.bin<suffix>, next to the input
+        Only the JSON extension is replaced, so that a JSON program and its
+        binary conversion do not write the same log.
+    '''
+    root, ext = os.path.splitext(inPath)
+    return (root if ext == '.json' else inPath) + suffix
+
+def programs(directory: str, suffix: str) -> list[str]:
+    ''' JSON and binary programs in `directory` '''
+    paths: list[str] = []
+    for path in sorted(glob.glob(os.path.join(directory, '*'))):
+        if not os.path.isfile(path) or path.endswith(suffix):
+            continue
+        try:
+            if path.endswith('.json') or Program.isBinary(path):
+                paths.append(path)
+        except OSError:
+            pass # unreadable: not a program
+    return paths
+
+def collect(patterns: list[str], suffix: str) -> list[str]:
+    ''' expand directories and globs into input programs, skipping our own outputs '''
+    paths: list[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(programs(pattern, suffix))
+            continue
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(path for path in matches if not path.endswith(suffix))
+    return list(dict.fromkeys(os.path.normpath(path) for path in paths)) # drop duplicates, keep order
+
+def clashes(inPaths: list[str], suffix: str) -> list[str]:
+    ''' inputs whose output path is also that of an earlier input '''
+    seen: set[str] = set()
+    clashing: list[str] = []
+    for inPath in inPaths:
+        outPath = os.path.normpath(outputPath(inPath, suffix))
+        if outPath in seen:
+            clashing.append(inPath)
+        seen.add(outPath)
+    return clashing
+
+def run(inPath: str, suffix: str, format: str, keyframe: int | None,
+        config: MachineConfig, policy: DumpPolicy | None = None) -> dict[str, Any]:
+    ''' simulate one program; never raises, so one failure cannot kill the batch '''
+    start = time.perf_counter()
+    result: dict[str, Any] = {'program': inPath, 'cycles': None, 'exceptionPC': None}
+    try:
+        program = load(inPath)
+        with open(outputPath(inPath, suffix), 'w') as fout:
+            cycles, ooo470 = simulate(program, fout, format, keyframe, config=config,
+                                      policy=policy)
+    except Exception as e:
+        result['status'] = f'error: {type(e).__name__}: {e}'
+    else:
+        result['status'] = 'ok'
+        result['cycles'] = cycles
+        if ooo470.halt: # halted after exception recovery
+            result['exceptionPC'] = ooo470.epc
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def summarize(results: list[dict[str, Any]], wall: float) -> str:
+    rows = [('program', 'cycles', 'exception PC', 'time (s)', 'status')]
+    for result in results:
+        rows.append((result['program'],
+                     '-' if result['cycles'] is None else str(result['cycles']),
+                     '-' if result['exceptionPC'] is None else str(result['exceptionPC']),
+                     '-' if result['seconds'] is None else f'{result["seconds"]:.3f}',
+                     result['status']))
+    widths = [max(len(row[col]) for row in rows) for col in range(len(rows[0]) - 1)]
+    lines = ['  '.join([cell.ljust(width) for cell, width in zip(row, widths)] + [row[-1]])
+             for row in rows]
+    failed = sum(result['status'] != 'ok' for result in results)
+    lines.append(f'{len(results)} programs, {failed} failed, '
+                 f'{sum(result["cycles"] or 0 for result in results)} cycles, '
+                 f'{wall:.3f} s wall')
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='simulate many OoO470 programs in parallel')
+    parser.add_argument('inputs', nargs='+', help='program files, directories or globs')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='worker processes (default: number of CPUs)')
+    parser.add_argument('--suffix', default='.out.json',
+                        help='output file suffix, replacing a .json extension (default: .out.json)')
+    addLogArguments(parser)
+    DumpPolicy.addArguments(parser)
+    MachineConfig.addArguments(parser)
+    args = parser.parse_args()
+
+    inPaths = collect(args.inputs, args.suffix)
+    if not inPaths:
+        sys.exit('no input programs')
+    clashing = clashes(inPaths, args.suffix)
+    if clashing:
+        sys.exit(f'output path of {", ".join(clashing)} is that of another input')
+    try:
+        keyframe = logKeyframe(args)
+        config = MachineConfig.fromArgs(args)
+        policy = DumpPolicy.fromArgs(args)
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+
+    start = time.perf_counter()
+    results: list[dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(run, inPath, args.suffix, args.format, keyframe, config, policy): inPath
+                   for inPath in inPaths}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e: # the worker died, e.g. BrokenProcessPool
+                results.append({'program': futures[future], 'cycles': None, 'exceptionPC': None,
+                                'status': f'error: {type(e).__name__}: {e}', 'seconds': None})
+    results.sort(key=lambda result: inPaths.index(result['program']))
+    print(summarize(results, time.perf_counter() - start))
+    sys.exit(1 if any(result['status'] != 'ok' for result in results) else 0)
@@ -0,0 +1,162 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from Config  import MachineConfig
+from Hooks   import StageProfiler
+from OoO470  import OoO470
+from Program import Program
+
+''' synthetic workloads '''
+def chain(n: int, seed: int = 0) -> list[str]:
+    ''' every instruction depends on the previous one '''
+    r = random.Random(seed)
+    ops = ['add x1, x1, x2', 'sub x1, x1, x3', 'mulu x1, x1, x2', 'addi x1, x1, 1']
+    return ['addi x2, x2, 1', 'addi x3, x3, 1'] + [r.choice(ops) for _ in range(n - 2)]
+
+def independent(n: int, seed: int = 0) -> list[str]:
+    ''' no instruction reads a register written by the program '''
+    r = random.Random(seed)
+    ops = ['add', 'sub', 'mulu']
+    return [f'{r.choice(ops)} x{16 + i % 16}, x{r.randrange(16)}, x{r.randrange(16)}'
+            for i in range(n)]
+
+def exceptions(n: int, positions: tuple[int] = (-1,), seed: int = 0) -> list[str]:
+    ''' independent `divu`/`remu` stream faulting (divisor x0 == 0) at `positions`
+        Only the first fault is ever reached; negative positions count from the
+        end, and positions inside the 15-instruction divisor prologue are ignored.
+    '''
+    r = random.Random(seed)
+    program = [f'addi x{i}, x0, {i}' for i in range(1, 16)] # non-zero divisors
+    faults = {(pos % n) for pos in positions}
+    for i in range(len(program), n):
+        op = r.choice(['divu', 'remu'])
+        divisor = 0 if i in faults else 1 + r.randrange(15)
+        program.append(f'{op} x{16 + i % 16}, x{1 + r.randrange(15)}, x{divisor}')
+    return program[:n]
+
+def saturate(n: int, seed: int = 0) -> list[str]:
+    ''' a slow dependency chain with many consumers that pile up in the IntQ '''
+    r = random.Random(seed)
+    program = []
+    for i in range(n):
+        if i % 8 == 0:
+            program.append('mulu x1, x1, x2')
+        else:
+            program.append(f'{r.choice(["add", "sub"])} x{16 + i % 16}, x1, x{r.randrange(2, 16)}')
+    return program
+
+workloads: dict[str, Callable[[int], list[str]]] = {'chain'      : chain,
+                                                    'independent': independent,
+                                                    'exceptions' : exceptions,
+                                                    'saturate'   : saturate}
+
+def run(program: Program, dump: bool, profiler: StageProfiler | None = None,
+        config: MachineConfig | None = None) -> int:
+    ''' simulate to completion and return the number of cycles '''
+    ooo470 = OoO470(program, config=config)
+    ooo470.hooks = profiler
+    if dump:
+        ooo470.dump()
+    cycle = 0
+    stop = False
+    while not stop:
+        cycle += 1
+        stop = ooo470.next()
+        if dump:
+            if profiler is not None:
+                profiler.pre('dump')
+            ooo470.dump()
+            if profiler is not None:
+                profiler.post('dump')
+    return cycle
+
+def measure(program: Program, repeat: int, dump: bool,
+            config: MachineConfig | None = None) -> dict[str, Any]:
+    # throughput: best of `repeat` uninstrumented runs
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cycles = run(program, dump, config=config)
+        best = min(best, time.perf_counter() - start)
+    # per-stage breakdown: one instrumented run
+    profiler = StageProfiler()
+    run(program, dump, profiler, config)
+    # peak memory: one traced run
+    tracemalloc.start()
+    run(program, dump, config=config)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'instructions': len(program),
+            'cycles': cycles,
+            'seconds': best,
+            'cyclesPerSecond': cycles / best,
+            'stageShare': dict(sorted(profiler.share().items())),
+            'peakMemoryBytes': peak}
+
+def revision() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> str:
+    lines = [f'vs {baseline.get("revision")}:']
+    for name, result in results['workloads'].items():
+        old = baseline['workloads'].get(name)
+        if old is None:
+            continue
+        lines.append(f'  {name:12s} cycles/s x{result["cyclesPerSecond"] / old["cyclesPerSecond"]:.2f}'
+                     f'  peak memory x{result["peakMemoryBytes"] / max(old["peakMemoryBytes"], 1):.2f}'
+                     + ('' if result['cycles'] == old['cycles'] else
+                        f'  CYCLES CHANGED {old["cycles"]} -> {result["cycles"]}'))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OoO470 simulator benchmarks')
+    parser.add_argument('--size', type=int, default=20000, help='instructions per workload')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per workload (best is kept)')
+    parser.add_argument('--workload', action='append', choices=workloads, default=None,
+                        help='workload to run (repeatable; default: all)')
+    parser.add_argument('--fault-at', type=int, nargs='+', default=[-1], metavar='POS',
+                        help='faulting instruction positions of the exceptions workload (default: -1)')
+    parser.add_argument('--dump', action='store_true', help='include OoO470.dump() every cycle')
+    parser.add_argument('--out', default=None, metavar='PATH', help='save results as JSON')
+    parser.add_argument('--compare', default=None, metavar='PATH', help='baseline results JSON')
+    MachineConfig.addArguments(parser)
+    args = parser.parse_args()
+    try:
+        config = MachineConfig.fromArgs(args)
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+
+    results: dict[str, Any] = {'revision': revision(),
+                               'python': platform.python_version(),
+                               'size': args.size,
+                               'dump': args.dump,
+                               'faultAt': args.fault_at,
+                               'config': config.toDict(),
+                               'workloads': {}}
+    for name in (args.workload or workloads):
+        if name == 'exceptions':
+            instructions = exceptions(args.size, tuple(args.fault_at))
+        else:
+            instructions = workloads[name](args.size)
+        result = measure(Program(instructions), args.repeat, args.dump, config)
+        results['workloads'][name] = result
+        stages = ' '.join(f'{stage} {share:.0%}' for stage, share in result['stageShare'].items())
+        print(f'{name:12s} {result["cycles"]:8d} cycles {result["cyclesPerSecond"]:10.0f} cycles/s '
+              f'peak {result["peakMemoryBytes"] / 1024:8.0f} KiB | {stages}')
+    if args.out is not None:
+        with open(args.out, 'w') as fout:
+            json.dump(results, fout, indent=4)
+    if args.compare is not None:
+        with open(args.compare, 'r') as fin:
+            print(compare(results, json.load(fin)))
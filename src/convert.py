@@ -0,0 +1,19 @@
+import argparse
+import sys
+
+from Program import Program
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='convert a JSON program to the binary format')
+    parser.add_argument('inPath')
+    parser.add_argument('outPath')
+    args = parser.parse_args()
+
+    try:
+        program = Program.load(args.inPath)
+    except ValueError as e:
+        sys.exit(f'{args.inPath}: {e}')
+    try:
+        program.save(args.outPath)
+    except ValueError as e:
+        sys.exit(f'{args.outPath}: {e}')
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
+
+import Functional
+from Config  import MachineConfig
+from ISA     import num_ar
+from OoO470  import OoO470
+from Program import Program
+
+
+''' differential testing of `OoO470` against the architectural model '''
+def generate(r: random.Random, length: int) -> list[str]:
+    ''' random program over few registers, so that instructions depend on each other
+        Divisors are often zero (most registers start at 0), so a good share
+        of programs take an exception somewhere.
+    '''
+    regs = r.randint(2, num_ar)
+    def reg() -> str:
+        return f'x{r.randrange(regs)}'
+
+    program = []
+    for _ in range(length):
+        op = r.choice(['add', 'addi', 'sub', 'mulu', 'divu', 'remu'])
+        if op == 'addi':
+            imm = r.randrange(-(1 << 63), 1 << 63) if r.random() < 0.1 else r.randrange(-16, 64)
+            program.append(f'addi {reg()}, {reg()}, {imm}')
+        else:
+            program.append(f'{op} {reg()}, {reg()}, {reg()}')
+    return program
+
+def reference(program: Program) -> tuple[list[int], int | None]:
+    ''' final architectural registers and exception PC (`None`: no exception) '''
+    regs = Functional.registers()
+    pc, _, faulted = Functional.run(program, regs)
+    return regs, (pc if faulted else None)
+
+def simulate(program: Program, config: MachineConfig | None = None,
+             maxCycles: int | None = None) -> tuple[list[int], int | None]:
+    ''' the same, as observed through `OoO470`'s register map and PRF '''
+    ooo470 = OoO470(program, config=config)
+    maxCycles = 100 * (len(program) + 10) if maxCycles is None else maxCycles
+    for _ in range(maxCycles):
+        if ooo470.next():
+            break
+    else:
+        raise RuntimeError(f'no completion within {maxCycles} cycles')
+    regs = [ooo470.prf[pr] for pr in ooo470.regMap]
+    return regs, (ooo470.epc if ooo470.halt else None)
+
+def check(instructions: list[str], config: MachineConfig | None = None) -> str | None:
+    ''' description of how the two models diverge on `instructions`, if they do '''
+    program = Program(instructions)
+    expected = reference(program)
+    try:
+        actual = simulate(program, config)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+    if actual[1] != expected[1]:
+        return f'exception PC {actual[1]}, expected {expected[1]}'
+    for ar, (value, want) in enumerate(zip(actual[0], expected[0])):
+        if value != want:
+            return f'x{ar} = {value}, expected {want}'
+    return None
+
+def shrink(instructions: list[str], config: MachineConfig | None = None) -> list[str]:
+    ''' smallest program found that still diverges (delta debugging over instructions) '''
+    chunk = len(instructions) // 2
+    while chunk >= 1:
+        start = 0
+        while start < len(instructions):
+            candidate = instructions[:start] + instructions[start + chunk:]
+            if check(candidate, config) is not None:
+                instructions = candidate
+            else:
+                start += chunk
+        chunk //= 2
+    # simpler immediates
+    for idx, instruction in enumerate(instructions):
+        if instruction.startswith('addi') and not instruction.endswith(' 0'):
+            candidate = instructions[:idx] + [instruction.rsplit(' ', 1)[0] + ' 0'] \
+                      + instructions[idx + 1:]
+            if check(candidate, config) is not None:
+                instructions = candidate
+    return instructions
+
+def trial(seed: int, length: int, config: MachineConfig) -> dict[str, Any] | None:
+    ''' one random program; the shrunk counterexample if the models diverge '''
+    instructions = generate(random.Random(seed), length)
+    divergence = check(instructions, config)
+    if divergence is None:
+        return None
+    instructions = shrink(instructions, config)
+    return {'seed': seed, 'divergence': check(instructions, config), 'program': instructions}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='compare OoO470 with the architectural model '
+                                                 'on random programs')
+    parser.add_argument('--count', type=int, default=1000, help='random programs (default: 1000)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first program (default: 0)')
+    parser.add_argument('--length', type=int, default=64, help='instructions per program (default: 64)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='worker processes (default: number of CPUs)')
+    parser.add_argument('--out', default=None, metavar='DIR',
+                        help='save shrunk failing programs as DIR/fuzz<seed>.json')
+    MachineConfig.addArguments(parser)
+    args = parser.parse_args()
+    try:
+        config = MachineConfig.fromArgs(args)
+        if args.out is not None:
+            os.makedirs(args.out, exist_ok=True)
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+
+    start = time.perf_counter()
+    failures: list[dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(trial, seed, args.length, config)
+                   for seed in range(args.seed, args.seed + args.count)]
+        for future in as_completed(futures):
+            failure = future.result()
+            if failure is not None:
+                failures.append(failure)
+    failures.sort(key=lambda failure: failure['seed'])
+    for failure in failures:
+        print(f'seed {failure["seed"]}: {failure["divergence"]}')
+        for instruction in failure['program']:
+            print(f'    {instruction}')
+        if args.out is not None:
+            with open(os.path.join(args.out, f'fuzz{failure["seed"]}.json'), 'w') as fout:
+                json.dump(failure['program'], fout, indent=4)
+    print(f'{args.count} programs, {len(failures)} diverged, '
+          f'{time.perf_counter() - start:.3f} s wall')
+    sys.exit(1 if failures else 0)
@@ -1,27 +1,279 @@
-import sys
+import argparse
+import cProfile
 import json
+import os
+import sys
+from typing import TextIO
+
+from OoO470     import OoO470
+import Checkpoint
+from Config     import MachineConfig
+from DumpPolicy import DumpPolicy
+from Hooks      import Hooks, StageProfiler
+from LogWriter  import LogWriter
+from Program    import Program
+from Snapshot   import DeltaEncoder
+from Trace      import Trace
+
+def load(path: str) -> Program:
+    ''' JSON or binary (memory-mapped) program '''
+    try:
+        return Program.load(path)
+    except ValueError as e:
+        raise ValueError(f'{path}: {e}') from None
+
+def simulate(program: Program, fout: TextIO, format: str = 'json',
+             keyframe: int | None = None, trace: Trace | None = None,
+             config: MachineConfig | None = None,
+             ffPC: int | None = None, ffCount: int | None = None,
+             checkpointEvery: int | None = None, checkpointDir: str = '.',
+             skipIdle: bool = False, counters: bool = False,
+             policy: DumpPolicy | None = None, hooks: Hooks | None = None) -> tuple[int, OoO470]:
+    ''' run `program` to completion, logging every cycle to `fout`
+        Delta snapshots are recorded if `keyframe` is set. If `ffPC` or
+        `ffCount` is set, the program is first fast-forwarded functionally
+        (see `OoO470.fastForward`) and cycle 0 is the fast-forwarded state.
+        With `skipIdle`, provably idle cycles are not simulated stage by
+        stage (see `OoO470.idleCycles`); the log is unchanged. With
+        `counters`, the final machine's `counters` hold performance counters.
+        `policy` selects the cycles and structures logged (default: all).
+        `hooks` are called around every stage, dump and log write.
+        Returns the number of cycles simulated and the final machine.
+    '''
+    trace = Trace() if trace is None else trace
+    ooo470 = OoO470(instructions=program, trace=trace, config=config, counters=counters)
+    ooo470.hooks = hooks
+    if ffPC is not None or ffCount is not None:
+        ooo470.fastForward(ffPC, ffCount)
+    log = LogWriter(fout, format)
+    delta = DeltaEncoder(keyframe) if keyframe is not None else None
+    policy = DumpPolicy() if policy is None else policy
+    trace.cycle(0)
+    record(ooo470, 0, log, delta, policy)
+    return run(ooo470, 0, log, delta, trace, checkpointEvery, checkpointDir, skipIdle, policy)
+
+def resume(path: str, fout: TextIO, trace: Trace | None = None,
+           checkpointEvery: int | None = None, checkpointDir: str = '.',
+           skipIdle: bool = False, hooks: Hooks | None = None,
+           state: dict | None = None) -> tuple[int, OoO470]:
+    ''' continue the run checkpointed at `path`
+        `fout` is the log of the interrupted run, opened for update; it is
+        truncated to where the checkpoint was taken, so the finished log is
+        identical to that of an uninterrupted run. `state` is the checkpoint,
+        if the caller has already loaded it.
+    '''
+    trace = Trace() if trace is None else trace
+    state = Checkpoint.load(path) if state is None else state
+    ooo470: OoO470 = state['machine']
+    ooo470.trace = trace
+    ooo470.hooks = hooks
+    if fout.seek(0, 2) < state['offset']:
+        raise ValueError(f'{path}: log is shorter than when the checkpoint was taken')
+    fout.seek(state['offset'])
+    fout.truncate()
+    log = LogWriter(fout, state['format'])
+    log.count = state['records']
+    return run(ooo470, state['cycle'], log, state['delta'], trace,
+               checkpointEvery, checkpointDir, skipIdle, state.get('policy', DumpPolicy()))
+
+def record(ooo470: OoO470, cycle: int, log: LogWriter, delta: DeltaEncoder | None,
+           policy: DumpPolicy, stop: bool = False, state: dict | None = None) -> dict | None:
+    ''' log `cycle` if `policy` wants it; returns the snapshot of `cycle`, if any
+        `state` is a snapshot known to be current, e.g. across idle cycles; it
+        is logged instead of taking a new one.
+    '''
+    if not policy.wants(cycle, ooo470, stop):
+        return state
+    hooks: Hooks | None = ooo470.hooks
+    if hooks is None:
+        if state is None:
+            state = capture(ooo470, delta, policy)
+        write(cycle, state, log, delta, policy)
+        return state
+    if state is None:
+        hooks.pre('dump')
+        state = capture(ooo470, delta, policy)
+        hooks.post('dump')
+    hooks.pre('log')
+    write(cycle, state, log, delta, policy)
+    hooks.post('log')
+    return state
+
+def capture(ooo470: OoO470, delta: DeltaEncoder | None, policy: DumpPolicy) -> dict:
+    ''' the state to log: a raw snapshot for the delta encoder, a dump otherwise '''
+    if delta is None:
+        return ooo470.dump(policy.fields)
+    return ooo470.snapshot(policy.fields)
+
+def write(cycle: int, state: dict, log: LogWriter, delta: DeltaEncoder | None,
+          policy: DumpPolicy) -> None:
+    if delta is not None:
+        log.write(delta.encode(cycle, state)) # delta records are numbered anyway
+    elif policy.sparse:
+        log.write({'Cycle': cycle, **state})
+    else:
+        log.write(state)
+
+def run(ooo470: OoO470, cycle: int, log: LogWriter, delta: DeltaEncoder | None, trace: Trace,
+        checkpointEvery: int | None, checkpointDir: str, skipIdle: bool = False,
+        policy: DumpPolicy | None = None) -> tuple[int, OoO470]:
+    ''' simulate from the end of `cycle` to completion '''
+    policy = DumpPolicy() if policy is None else policy
+    def checkpoint() -> None:
+        if checkpointEvery and cycle % checkpointEvery == 0:
+            log.fout.flush()
+            Checkpoint.save(Checkpoint.path(checkpointDir, cycle),
+                            {'cycle': cycle,
+                             'machine': ooo470,
+                             'format': log.format,
+                             'records': log.count,
+                             'offset': log.fout.tell(),
+                             'delta': delta,
+                             'policy': policy})
 
-from OoO470 import OoO470
+    # Each cycle's state is written as soon as it is produced, so memory
+    # stays flat regardless of the number of simulated cycles.
+    with log:
+        state: dict | None = None # snapshot of the last cycle, if taken
+        stop = False
+        while not stop:
+            idle = ooo470.idleCycles() if skipIdle else 0
+            if idle > 0:
+                # The state does not change: repeat the previous snapshot.
+                for _ in range(idle):
+                    cycle += 1
+                    trace.cycle(cycle)
+                    ooo470.skip()
+                    state = record(ooo470, cycle, log, delta, policy, state=state)
+                    checkpoint()
+                continue
+
+            cycle += 1
+            trace.cycle(cycle)
+            stop = ooo470.next()
+            state = record(ooo470, cycle, log, delta, policy, stop)
+            if not stop:
+                checkpoint()
+    return cycle, ooo470
+
+def addLogArguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--format', choices=LogWriter.formats, default='json',
+                        help='per-cycle log format (default: indented JSON array)')
+    parser.add_argument('--compact', dest='format', action='store_const', const='compact',
+                        help='alias for --format compact')
+    parser.add_argument('--ndjson', dest='format', action='store_const', const='ndjson',
+                        help='alias for --format ndjson')
+    parser.add_argument('--delta', action='store_true',
+                        help='record only state changed since the previous cycle')
+    parser.add_argument('--keyframe', type=int, default=64, metavar='N',
+                        help='full state every N cycles in --delta mode (default: 64)')
+
+def logKeyframe(args: argparse.Namespace) -> int | None:
+    ''' keyframe interval of --delta logs, `None` without --delta '''
+    if args.keyframe < 1:
+        raise ValueError('keyframe interval must be positive')
+    return args.keyframe if args.delta else None
 
 if __name__ == '__main__':
-    inPath = sys.argv[1]
-    outPath = sys.argv[2]
-
-    with open(inPath, 'r') as fin:
-        instructions: list[str] = json.load(fin)
-    
-    cycle: int = 0
-    log: list = []
-    ooo470 = OoO470(instructions=instructions)
-    print('cycle', format(cycle, '02d'))
-    log.append(ooo470.dump())
-
-    stop = False
-    while not stop:
-        cycle += 1
-        print('cycle', format(cycle, '02d'), end=' ')
-        stop = ooo470.next()
-        log.append(ooo470.dump())
-    
-    with open(outPath, 'w') as fout:
-        json.dump(log, fout, indent=4)
+    parser = argparse.ArgumentParser(description='OoO470 simulator')
+    parser.add_argument('inPath')
+    parser.add_argument('outPath')
+    addLogArguments(parser)
+    parser.add_argument('--trace', choices=Trace.levels, default='stage',
+                        help='pipeline trace detail (default: stage)')
+    parser.add_argument('--quiet', dest='trace', action='store_const', const='off',
+                        help='alias for --trace off')
+    parser.add_argument('--trace-file', default=None, metavar='PATH',
+                        help='write the trace to PATH instead of stdout')
+    parser.add_argument('--ff-pc', type=int, default=None, metavar='PC',
+                        help='execute functionally up to PC, then simulate in detail')
+    parser.add_argument('--ff-count', type=int, default=None, metavar='N',
+                        help='execute N instructions functionally, then simulate in detail')
+    parser.add_argument('--checkpoint-every', type=int, default=None, metavar='N',
+                        help='checkpoint the simulator state every N cycles')
+    parser.add_argument('--checkpoint-dir', default='.', metavar='DIR',
+                        help='where checkpoints are written (default: .)')
+    parser.add_argument('--skip-idle', action='store_true',
+                        help='fast-path cycles in which the pipeline is provably idle')
+    parser.add_argument('--counters', default=None, metavar='PATH',
+                        help="write a JSON summary of performance counters to PATH ('-': stdout)")
+    parser.add_argument('--profile', action='store_true',
+                        help='print where the simulator spends its time, per stage and per dump')
+    parser.add_argument('--profile-stats', default=None, metavar='PATH',
+                        help='also run under cProfile and write pstats data to PATH')
+    parser.add_argument('--resume', default=None, metavar='CHECKPOINT',
+                        help='continue an interrupted run whose log is outPath; '
+                             'program, machine, log and dump options come from the checkpoint')
+    DumpPolicy.addArguments(parser)
+    MachineConfig.addArguments(parser)
+    args = parser.parse_args()
+
+    def report(ooo470: OoO470) -> None:
+        if args.counters is None or ooo470.counters is None:
+            return
+        summary = json.dumps(ooo470.counters.summary(), indent=4)
+        if args.counters == '-':
+            print(summary)
+        else:
+            with open(args.counters, 'w') as fout:
+                fout.write(summary)
+
+    profiler = StageProfiler() if args.profile else None
+    cprofile = cProfile.Profile() if args.profile_stats is not None else None
+    def profile() -> None:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.profile_stats)
+        if profiler is not None:
+            print(profiler.report(), file=sys.stderr)
+
+    def openTrace() -> Trace:
+        ''' opened only once the arguments are known to be good '''
+        return Trace(Trace.levels[args.trace],
+                     None if args.trace_file is None else open(args.trace_file, 'w'))
+
+    if args.resume is not None:
+        trace: Trace | None = None
+        try:
+            if args.checkpoint_every:
+                os.makedirs(args.checkpoint_dir, exist_ok=True)
+            state = Checkpoint.load(args.resume)
+            with open(args.outPath, 'r+') as fout:
+                trace = openTrace()
+                if cprofile is not None:
+                    cprofile.enable()
+                _, ooo470 = resume(args.resume, fout, trace, args.checkpoint_every,
+                                   args.checkpoint_dir, args.skip_idle, profiler, state)
+        except (OSError, ValueError) as e:
+            sys.exit(str(e))
+        finally:
+            if trace is not None:
+                trace.close()
+        profile()
+        report(ooo470)
+        sys.exit()
+
+    try:
+        program = load(args.inPath)
+        config = MachineConfig.fromArgs(args)
+        policy = DumpPolicy.fromArgs(args)
+        keyframe = logKeyframe(args)
+        if args.ff_pc is not None and args.ff_pc < 0:
+            raise ValueError('fast-forward PC must not be negative')
+        if args.ff_count is not None and args.ff_count < 0:
+            raise ValueError('fast-forward count must not be negative')
+        if args.checkpoint_every:
+            os.makedirs(args.checkpoint_dir, exist_ok=True)
+        trace = openTrace()
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+
+    with open(args.outPath, 'w') as fout:
+        if cprofile is not None:
+            cprofile.enable()
+        _, ooo470 = simulate(program, fout, args.format, keyframe, trace, config,
+                             args.ff_pc, args.ff_count, args.checkpoint_every, args.checkpoint_dir,
+                             args.skip_idle, args.counters is not None, policy, profiler)
+    trace.close()
+    profile()
+    report(ooo470)